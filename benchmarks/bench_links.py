@@ -0,0 +1,63 @@
+"""Compares resolving link references with a regular expression over the whole document,
+counting the lines in front of every match, against collecting them from the tokenizer.
+Also times link reference validation (rule 4.1) with a list and a set of versions.
+
+    python -m benchmarks.bench_links [versions]
+"""
+import re
+import sys
+import timeit
+
+import kacl
+from kacl.element import KACLElement
+from kacl.parser import KACLParser
+from kacl.rules import KACLRuleContext, KACLRules
+from kacl.validation import KACLValidation
+
+from .generator import generate
+
+# link references were resolved with this pattern before the tokenizer collected them
+LINK_REFERENCES = re.compile(r'\n\[(.*)\]:(.*)')
+
+
+def regex_link_references(text):
+    link_references = dict()
+    for match in LINK_REFERENCES.finditer(text):
+        version = match.group(1).strip()
+        line_number = text[:match.start()].count('\n')+1
+        link_references[version] = KACLElement(raw=match.group().strip(), title=version, body=match.group(2).strip(), line_number=line_number)
+    return link_references
+
+
+def tokenizer_link_references(text):
+    return KACLParser.parse_link_references(text)[1]
+
+
+def validate_links(document, version_strings):
+    context = KACLRuleContext(document)
+    context.version_strings = version_strings
+    validation = KACLValidation()
+    rule = KACLRules.get('4.1')
+    for version_string, link in document.link_references().items():
+        rule.run(context, validation, version_string, link)
+    return validation
+
+
+def main(argv):
+    versions = int(argv[1]) if len(argv) > 1 else 10000
+    text = generate(versions=versions, sections=1, items=1)
+    document = kacl.parse(text)
+    links = len(document.link_references())
+    assert regex_link_references(text).keys() == tokenizer_link_references(text).keys()
+
+    version_strings = [v.version() for v in document.versions()]
+    for name, func in [('regex', lambda: regex_link_references(text)),
+                       ('tokenizer', lambda: tokenizer_link_references(text)),
+                       ('4.1 list', lambda: validate_links(document, version_strings)),
+                       ('4.1 set', lambda: validate_links(document, set(version_strings)))]:
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        print(f'{name:>10}: {seconds*1000:10.2f} ms for {links} link references')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
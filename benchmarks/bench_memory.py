@@ -0,0 +1,45 @@
+"""Measures the memory held by the element model of a large changelog with tracemalloc.
+The source text itself is created before tracing starts and is not included.
+
+    python -m benchmarks.bench_memory [megabytes]
+"""
+import sys
+import tracemalloc
+
+import kacl
+
+from .generator import generate
+
+
+def megabytes(size):
+    return f'{size/1024/1024:8.2f} MB'
+
+
+def main(argv):
+    size = float(argv[1]) if len(argv) > 1 else 50
+    sample = generate(versions=100)
+    data = generate(versions=max(1, int(size*1024*1024*100/len(sample))))
+
+    tracemalloc.start()
+    document = kacl.parse(data)
+    parsed, _ = tracemalloc.get_traced_memory()
+
+    for version in document.versions():
+        version.sections()
+    sections, _ = tracemalloc.get_traced_memory()
+
+    for version in document.versions():
+        for section in version.sections().values():
+            section.items()
+    items, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'{"source":>10}: {megabytes(len(data))} ({len(document.versions())} versions)')
+    print(f'{"parsed":>10}: {megabytes(parsed)}')
+    print(f'{"sections":>10}: {megabytes(sections)}')
+    print(f'{"items":>10}: {megabytes(items)}')
+    print(f'{"peak":>10}: {megabytes(peak)}')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
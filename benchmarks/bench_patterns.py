@@ -0,0 +1,53 @@
+"""Compares the precompiled pattern registry against building and looking up the
+patterns on every call.
+
+    python -m benchmarks.bench_patterns [versions]
+"""
+import re
+import sys
+import timeit
+
+import kacl
+from kacl.parser import KACLParser
+from kacl.patterns import KACLPatterns
+
+from .generator import generate
+
+
+def uncached(versions):
+    semver_regex = KACLParser.semver_regex
+    for v in versions:
+        title = v.title()
+        re.search(semver_regex, title)
+        re.search(r'\d\d\d\d-\d\d-\d\d', title)
+        re.search(f'#\\s+\\[{semver_regex}\\]', v.raw())
+        re.match(r'#\s+\[(.*)\]', v.raw())
+        re.match(r'\d\d\d\d-[0-1][0-9]-[0-3][0-9]', '2020-01-01')
+
+
+def cached(versions):
+    semver = KACLPatterns.get(KACLPatterns.SEMVER)
+    date = KACLPatterns.get(KACLPatterns.DATE)
+    linked_version = KACLPatterns.get(KACLPatterns.LINKED_VERSION, depth=2)
+    linked_version_title = KACLPatterns.get(KACLPatterns.LINKED_VERSION_TITLE, depth=2)
+    date_format = KACLPatterns.get(KACLPatterns.DATE_FORMAT)
+    for v in versions:
+        title = v.title()
+        semver.search(title)
+        date.search(title)
+        linked_version.search(v.raw())
+        linked_version_title.match(v.raw())
+        date_format.match('2020-01-01')
+
+
+def main(argv):
+    versions = int(argv[1]) if len(argv) > 1 else 10000
+    document = kacl.parse(generate(versions=versions, sections=1, items=1))
+
+    for name, func in [('uncached', uncached), ('cached', cached)]:
+        seconds = min(timeit.repeat(lambda: func(document.versions()), number=1, repeat=5))
+        print(f'{name:>10}: {seconds*1000:8.2f} ms for {versions} versions')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,56 @@
+"""Measures the startup time of `kacl-cli current` and the import time of the
+modules it loads, as reported by `python -X importtime`.
+
+    python -m benchmarks.bench_startup [runs]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from .generator import generate
+
+MODULES = ['kacl', 'click', 'semver', 'yaml', 'git']
+
+
+def import_times(stderr):
+    """returns the cumulative import time in microseconds of every top level import"""
+    times = dict()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def run(changelog_file):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'kacl.kacl_cli', '-f', changelog_file, 'current'],
+                            capture_output=True, text=True, check=True)
+    return time.perf_counter()-start, import_times(result.stderr)
+
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 10
+
+    with tempfile.TemporaryDirectory() as directory:
+        changelog_file = os.path.join(directory, 'CHANGELOG.md')
+        with open(changelog_file, 'w') as f:
+            f.write(generate(versions=10))
+
+        results = [run(changelog_file) for _ in range(runs)]
+
+    wall_time = min(x[0] for x in results)
+    print(f'{"kacl-cli current":>16}: {wall_time*1000:8.2f} ms (best of {runs})')
+    for module in MODULES:
+        times = [x[1][module] for x in results if module in x[1]]
+        if times:
+            print(f'{"import " + module:>16}: {min(times)/1000:8.2f} ms')
+        else:
+            print(f'{"import " + module:>16}: {"not loaded":>8}')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,142 @@
+"""Times the library operations and the CLI entry points on synthetic changelogs and
+writes the results to a JSON file. Passing the results of an earlier run reports all
+benchmarks that got slower, the exit code is the number of regressions.
+
+    python -m benchmarks.bench_suite [-o results.json] [--baseline previous.json] [--quick]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import kacl
+
+from .generator import generate
+
+HOST_URL = 'https://github.com/org/repo'
+
+# name -> keyword arguments of 'generate'
+CHANGELOGS = {
+    'small': dict(versions=10),
+    'medium': dict(versions=1000),
+    'large': dict(versions=10000),
+    'large-no-links': dict(versions=10000, links=False),
+    'large-crlf': dict(versions=10000, line_ending='\r\n'),
+}
+
+QUICK_CHANGELOGS = {
+    'small': dict(versions=10),
+    'medium': dict(versions=1000),
+    'medium-no-links': dict(versions=1000, links=False),
+    'medium-crlf': dict(versions=1000, line_ending='\r\n'),
+}
+
+
+def measure(func, setup=None, repeat=5):
+    """returns the best time in seconds of 'repeat' calls of 'func' with the result of 'setup'"""
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else None
+        start = time.perf_counter()
+        func(args)
+        times.append(time.perf_counter()-start)
+    return min(times)
+
+
+def release(document):
+    document.add('Added', 'benchmark change')
+    document.release(increment='patch', link=HOST_URL)
+
+
+def library_benchmarks(data, repeat):
+    parse = lambda: kacl.parse(data)
+    return {
+        'parse': measure(lambda _: kacl.parse(data), repeat=repeat),
+        'validate': measure(lambda document: document.validate(), setup=parse, repeat=repeat),
+        'dump': measure(lambda document: kacl.dump(document), setup=parse, repeat=repeat),
+        'release': measure(release, setup=parse, repeat=repeat),
+        'generate_links': measure(lambda document: document.generate_links(host_url=HOST_URL), setup=parse, repeat=repeat),
+        'generate_links incremental': measure(lambda document: document.generate_links(host_url=HOST_URL, incremental=True), setup=parse, repeat=repeat),
+    }
+
+
+def cli(*args):
+    subprocess.run([sys.executable, '-m', 'kacl.kacl_cli'] + list(args), capture_output=True, check=False)
+
+
+def cli_benchmarks(changelog_file, repeat):
+    return {
+        'cli verify': measure(lambda _: cli('-f', changelog_file, 'verify'), repeat=repeat),
+        'cli current': measure(lambda _: cli('-f', changelog_file, 'current'), repeat=repeat),
+        'cli get': measure(lambda _: cli('-f', changelog_file, 'get', '0.0.1'), repeat=repeat),
+        'cli add': measure(lambda _: cli('-f', changelog_file, 'add', 'Added', 'benchmark change'), repeat=repeat),
+    }
+
+
+def run(changelogs, repeat):
+    results = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        for name, arguments in changelogs.items():
+            data = generate(**arguments)
+            changelog_file = os.path.join(directory, f'{name}.md')
+            with open(changelog_file, 'w', newline='') as f:
+                f.write(data)
+
+            timings = library_benchmarks(data, repeat)
+            timings.update(cli_benchmarks(changelog_file, repeat))
+            for benchmark, seconds in timings.items():
+                results[f'{name}/{benchmark}'] = seconds
+                print(f'{name + "/" + benchmark:>32}: {seconds*1000:10.2f} ms')
+    return results
+
+
+def regressions(results, baseline, threshold):
+    """returns (name, seconds, baseline seconds) of all benchmarks slower than 'threshold' times the baseline"""
+    slower = []
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        if reference and seconds > reference*threshold:
+            slower.append((name, seconds, reference))
+    return slower
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_suite', description=__doc__.splitlines()[0])
+    parser.add_argument('-o', '--output', default='benchmark-results.json', help='file the results are written to')
+    parser.add_argument('--baseline', default=None, help='results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25, help='ratio to the baseline that counts as regression')
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs of every benchmark, the best one counts')
+    parser.add_argument('--quick', action='store_true', help='only use small and medium changelogs')
+    args = parser.parse_args(argv[1:])
+
+    changelogs = QUICK_CHANGELOGS if args.quick else CHANGELOGS
+    results = run(changelogs, args.repeat)
+    report = {
+        'kacl': kacl.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'changelogs': changelogs,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4, sort_keys=True)
+    print(f'results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+        slower = regressions(results, baseline, args.threshold)
+        for name, seconds, reference in slower:
+            print(f'regression {name}: {reference*1000:.2f} ms -> {seconds*1000:.2f} ms')
+        return len(slower)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
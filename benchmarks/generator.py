@@ -0,0 +1,54 @@
+"""Creates synthetic changelogs in "keep-a-changelog" format for benchmarking."""
+
+HEADER = """# Changelog
+All notable changes to this project will be documented in this file.
+
+The format is based on [Keep a Changelog](https://keepachangelog.com/en/1.0.0/), and this project adheres to [Semantic Versioning](https://semver.org/spec/v2.0.0.html).
+"""
+
+SECTIONS = ['Added', 'Changed', 'Deprecated', 'Removed', 'Fixed', 'Security']
+
+
+def version_string(index):
+    """Returns a unique semantic version for an index, larger indices give larger versions"""
+    return f'{index // 100}.{(index // 10) % 10}.{index % 10}'
+
+
+def generate(versions=1000, sections=3, items=5, links=True, line_ending='\n'):
+    """Generates a valid changelog
+
+    Keyword Arguments:
+        versions {[int]} -- number of released versions (default: {1000})
+        sections {[int]} -- number of change sections per version (default: {3})
+        items {[int]} -- number of list items per section (default: {5})
+        links {[bool]} -- add link references for all versions (default: {True})
+        line_ending {[str]} -- line ending of the changelog, i.e. '\\r\\n' (default: {'\\n'})
+
+    Returns:
+        [str] -- changelog text
+    """
+    lines = [HEADER, '## [Unreleased]' if links else '## Unreleased', '']
+    for i in range(versions, 0, -1):
+        if links:
+            lines.append(f'## [{version_string(i)}] - 2020-01-01')
+        else:
+            lines.append(f'## {version_string(i)} - 2020-01-01')
+        for section in SECTIONS[:sections]:
+            lines.append(f'### {section}')
+            lines.extend([f'- change {k} of version {version_string(i)}' for k in range(items)])
+            lines.append('')
+
+    if links:
+        lines.extend(link_references(versions))
+
+    return '\n'.join(lines).replace('\n', line_ending)
+
+
+def link_references(versions):
+    """Returns the link reference lines of all versions"""
+    lines = [f'[Unreleased]: https://github.com/org/repo/compare/v{version_string(versions)}...HEAD']
+    for i in range(versions, 1, -1):
+        lines.append(f'[{version_string(i)}]: https://github.com/org/repo/compare/v{version_string(i-1)}...v{version_string(i)}')
+    lines.append(f'[{version_string(1)}]: https://github.com/org/repo/tree/v{version_string(1)}')
+    lines.append('')
+    return lines
@@ -1,14 +1,25 @@
 # Version of the python-kacl package
 __version__ = "0.3.4"
 
+import os
+
 from .document import *
 from .serializer import *
+from .reader import *
+from .source import *
+from .validation import *
 
-def load(file):
+def load(file, mmap=False):
     """
     Parse the first YAML document in a stream
     and produce the corresponding Python object.
+
+    With 'mmap' the file is memory mapped instead of read, element texts are
+    only decoded when they are accessed.
     """
+    if mmap:
+        return KACLDocument.parse(KACLMappedSource.open(file))
+
     doc = None
     with open(file, 'r') as f:
         document = f.read()
@@ -18,11 +29,146 @@ def load(file):
             f.close()
     return doc
 
+def iter_versions(file):
+    """Reads the versions of a changelog one at a time without loading the whole file.
+    The versions do not have links, use KACLReader to look them up.
+
+    Arguments:
+        file {[str]} -- path to the changelog
+
+    Returns:
+        [generator] -- KACLVersions in document order
+    """
+    with open(file, 'r') as f:
+        yield from KACLReader(f).versions()
+
+def verify(file, config=None, cache=None):
+    """Loads and validates a single changelog file
+
+    Arguments:
+        file {[str]} -- path to the changelog
+
+    Keyword Arguments:
+        config {[KACLConfig]} -- config used for validation (default: {KACLConfig()})
+        cache {[KACLCache]} -- cache for parse and validation results (default: {None})
+
+    Returns:
+        [KACLValidation] -- validation result of the changelog
+    """
+    if config is None:
+        config = KACLConfig()
+
+    if cache:
+        with open(file, 'r') as f:
+            data = f.read()
+        key = cache.key(data, config)
+        document, validation = cache.get(key, data=data, config=config)
+        if validation is not None:
+            return validation
+        document = KACLDocument.parse(data)
+    else:
+        document = load(file, mmap=True)
+
+    document.config = config
+    validation = document.validate()
+    if cache:
+        cache.put(key, document, validation)
+    return validation
+
+def verify_many(files, config=None, jobs=None, cache=None):
+    """Validates several changelog files with the same config in a pool of worker processes
+
+    Arguments:
+        files {[list]} -- paths to the changelogs
+
+    Keyword Arguments:
+        config {[KACLConfig]} -- config used for validation (default: {KACLConfig()})
+        jobs {[int]} -- number of worker processes, None or 0 uses all cpus (default: {None})
+        cache {[KACLCache]} -- cache for parse and validation results (default: {None})
+
+    Returns:
+        [dict] -- KACLValidation for every file, in order of 'files'
+    """
+    if config is None:
+        config = KACLConfig()
+
+    files = list(files)
+    if not jobs:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(files))
+
+    if jobs <= 1:
+        return {file: verify(file, config, cache) for file in files}
+
+    import concurrent.futures
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        validations = executor.map(verify, files, [config]*len(files), [cache]*len(files))
+        return dict(zip(files, validations))
+
 def parse(text):
     return KACLDocument.parse(text)
 
-def dump(document):
+def dump(document, fp=None):
+    """Serializes a document or version into markdown
+
+    Arguments:
+        document {[KACLDocument]} -- document or version to serialize
+
+    Keyword Arguments:
+        fp {[file]} -- text file object the markdown is written to version by version (default: {None})
+
+    Returns:
+        [str] -- markdown text, None if it was written to 'fp'
+    """
+    if fp is not None:
+        KACLMarkdownSerializer().serialize_to(document, fp)
+        return None
     return KACLMarkdownSerializer().serialize(document)
 
+def save(document, file):
+    """Writes a document atomically. The markdown is written to a temporary file next to
+    'file', which then replaces it, so readers never see a partially written changelog.
+    The file is left untouched if its content does not change.
+
+    Arguments:
+        document {[KACLDocument]} -- document to write
+        file {[str]} -- path to the changelog
+
+    Returns:
+        [bool] -- true if the file was written
+    """
+    import filecmp
+    import shutil
+
+    # replace the target of symbolic links instead of the link
+    file = os.path.realpath(file)
+    directory, name = os.path.split(file)
+    while True:
+        temp_file = os.path.join(directory, f'.{name}.{os.urandom(4).hex()}.tmp')
+        try:
+            # new files get the default mode, the OS applies the umask
+            fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with os.fdopen(fd, 'w') as f:
+            dump(document, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if os.path.exists(file):
+            if filecmp.cmp(file, temp_file, shallow=False):
+                os.remove(temp_file)
+                return False
+            shutil.copymode(file, temp_file)
+        os.replace(temp_file, file)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    return True
+
 def new():
     return KACLDocument.init()
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""Coroutines loading, validating and writing changelogs without blocking the event loop.
+
+File I/O, parsing and validation run in an executor shared by all coroutines, a thread pool
+unless another executor is configured. A semaphore limits the number of calls running in the
+executor at the same time, all other calls wait without taking a worker.
+
+    import asyncio
+    import kacl.aio
+
+    validations = asyncio.run(kacl.aio.verify_many(['CHANGELOG.md', 'other/CHANGELOG.md']))
+
+Cancelling a coroutine releases its place right away. Calls that did not start in the
+executor yet are dropped, calls that already run finish in the background and their result
+is discarded. Files are written with kacl.save, a cancelled 'dump' never leaves a partially
+written changelog behind.
+"""
+import asyncio
+import functools
+import os
+import weakref
+
+from . import load as load_file, save, verify as verify_file
+from .document import KACLDocument
+from .serializer import KACLMarkdownSerializer
+
+
+class KACLAsyncPool:
+    """Executor and concurrency limit shared by all coroutines of kacl.aio"""
+    __executor = None
+    __limit = None
+    # semaphores belong to an event loop
+    __semaphores = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def configure(executor=None, limit=None):
+        """Sets the executor and the number of calls running concurrently. A process pool
+        can be used as executor, documents and validations are then pickled between the
+        processes.
+
+        Keyword Arguments:
+            executor {[concurrent.futures.Executor]} -- executor running all calls, None uses a shared thread pool (default: {None})
+            limit {[int]} -- maximum number of calls in the executor at the same time, None uses the number of cpus (default: {None})
+        """
+        KACLAsyncPool.__executor = executor
+        KACLAsyncPool.__limit = limit
+        KACLAsyncPool.__semaphores = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def limit():
+        return KACLAsyncPool.__limit or os.cpu_count() or 1
+
+    @staticmethod
+    def executor():
+        if KACLAsyncPool.__executor is None:
+            import concurrent.futures
+
+            KACLAsyncPool.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=KACLAsyncPool.limit(),
+                                                                            thread_name_prefix='kacl')
+        return KACLAsyncPool.__executor
+
+    @staticmethod
+    async def run(func, *args, **kwargs):
+        """Runs 'func' in the executor once the semaphore of the running loop lets it
+
+        Returns:
+            [object] -- result of 'func'
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = KACLAsyncPool.__semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(KACLAsyncPool.limit())
+            KACLAsyncPool.__semaphores[loop] = semaphore
+
+        async with semaphore:
+            return await loop.run_in_executor(KACLAsyncPool.executor(), functools.partial(func, *args, **kwargs))
+
+
+async def load(file, mmap=False):
+    """Reads and parses a changelog file
+
+    Arguments:
+        file {[str]} -- path to the changelog
+
+    Keyword Arguments:
+        mmap {[bool]} -- memory map the file instead of reading it (default: {False})
+
+    Returns:
+        [KACLDocument] -- parsed changelog
+    """
+    return await KACLAsyncPool.run(load_file, file, mmap=mmap)
+
+
+async def parse(text):
+    return await KACLAsyncPool.run(KACLDocument.parse, text)
+
+
+async def validate(document, config=None):
+    """Validates a document
+
+    Arguments:
+        document {[KACLDocument]} -- document to validate
+
+    Keyword Arguments:
+        config {[KACLConfig]} -- config used for validation, the config of the document if None (default: {None})
+
+    Returns:
+        [KACLValidation] -- object holding all error information
+    """
+    if config is not None:
+        document.config = config
+    return await KACLAsyncPool.run(document.validate)
+
+
+async def verify(file, config=None):
+    """Loads and validates a changelog file in a single call of the executor
+
+    Arguments:
+        file {[str]} -- path to the changelog
+
+    Keyword Arguments:
+        config {[KACLConfig]} -- config used for validation (default: {KACLConfig()})
+
+    Returns:
+        [KACLValidation] -- validation result of the changelog
+    """
+    return await KACLAsyncPool.run(verify_file, file, config)
+
+
+async def verify_many(files, config=None):
+    """Validates several changelog files concurrently. If one of them fails or the call is
+    cancelled, all other validations are cancelled as well.
+
+    Arguments:
+        files {[list]} -- paths to the changelogs
+
+    Keyword Arguments:
+        config {[KACLConfig]} -- config used for validation (default: {KACLConfig()})
+
+    Returns:
+        [dict] -- KACLValidation for every file, in order of 'files'
+    """
+    files = list(files)
+    tasks = [asyncio.ensure_future(verify(file, config)) for file in files]
+    try:
+        validations = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return dict(zip(files, validations))
+
+
+async def dump(document, file=None):
+    """Serializes a document into markdown
+
+    Arguments:
+        document {[KACLDocument]} -- document or version to serialize
+
+    Keyword Arguments:
+        file {[str]} -- path the changelog is written to atomically (default: {None})
+
+    Returns:
+        [str] -- markdown text if no 'file' is given, otherwise true if the file was written
+    """
+    if file is not None:
+        return await KACLAsyncPool.run(save, document, file)
+    return await KACLAsyncPool.run(KACLMarkdownSerializer().serialize, document)
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+
+from .document import KACLDocument
+from .validation import KACLValidation
+
+CACHE_FORMAT_VERSION = 2
+
+
+class KACLCache:
+    """On-disk cache for parsed changelogs and their validation results.
+
+    Entries are keyed by the content of the changelog, the configuration, the registered
+    validation rules and the version of kacl, so any change to one of them results in a
+    cache miss. Entries are never removed, delete the directory to clear the cache.
+    """
+    def __init__(self, directory='.kacl-cache'):
+        self.directory = directory
+
+    def key(self, data, config):
+        """Computes the cache key for a changelog
+
+        Arguments:
+            data {[str]} -- content of the changelog file
+            config {[KACLConfig]} -- config used for validation
+
+        Returns:
+            [str] -- hex digest identifying the cache entry
+        """
+        from . import __version__
+        from .rules import KACLRules
+
+        # rules registered or removed at runtime change the validation result
+        rules = ','.join(f'{x.rule_id()}/{x.scope()}/{x.severity()}' for x in KACLRules.rules())
+        checksum = hashlib.sha256()
+        checksum.update(f'{__version__}:{CACHE_FORMAT_VERSION}:{config.checksum()}:{rules}:'.encode('utf-8'))
+        checksum.update(data.encode('utf-8'))
+        return checksum.hexdigest()
+
+    def get(self, key, data=None, config=None):
+        """Reads an entry from the cache
+
+        Arguments:
+            key {[str]} -- cache key
+
+        Keyword Arguments:
+            data {[str]} -- content of the changelog file (default: {None})
+            config {[KACLConfig]} -- config to attach to the document (default: {None})
+
+        Returns:
+            [tuple] -- KACLDocument and KACLValidation, (None, None) on a cache miss
+        """
+        try:
+            with open(self.__path(key), 'rb') as f:
+                entry = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+        except (OSError, ValueError, zlib.error):
+            return None, None
+
+        document = KACLDocument.from_dict(entry['document'], data=data, config=config)
+        validation = None
+        if entry.get('validation') is not None:
+            validation = KACLValidation.from_dict(entry['validation'])
+        return document, validation
+
+    def put(self, key, document, validation=None):
+        """Stores a document and optionally its validation result in the cache
+
+        Arguments:
+            key {[str]} -- cache key
+            document {[KACLDocument]} -- parsed changelog
+
+        Keyword Arguments:
+            validation {[KACLValidation]} -- validation result of the document (default: {None})
+        """
+        entry = {
+            'document': document.convert_to_dict(offsets=True),
+            'validation': validation.convert_to_dict() if validation else None
+        }
+        content = zlib.compress(json.dumps(entry, separators=(',', ':')).encode('utf-8'))
+
+        os.makedirs(self.directory, exist_ok=True)
+        # write to a temporary file first, parallel readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, self.__path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __path(self, key):
+        return os.path.join(self.directory, f'{key}.json.z')
@@ -1,23 +1,39 @@
-from .parser import KACLParser
 from .element import KACLElement
-import re
+from .parser import KACLParser
+from .tokenizer import KACLToken, KACLTokenizer
 
 
 class KACLChanges(KACLElement):
+    __slots__ = ('__items', '__dirty')
+
     def __init__(self, element):
-        KACLElement.__init__(self, 
-                             raw=element.raw(),
-                             title=element.title(),
-                             body=element.body(),
+        KACLElement.__init__(self,
+                             source=element.source(),
+                             spans=element.spans(),
                              line_number=element.line_number())
         self.__items = []
+        self.__dirty = False
 
     def items(self):
-        if not len(self.__items) and len(self.body().strip()):
-            body = self.body()
-            items = ("\n"+body).split('\n-')
-            self.__items = [x.strip() for x in items if len(x.strip()) > 0]
+        if not len(self.__items):
+            source = self.source()
+            _, _, (body_start, body_end) = self.spans()
+            # every line starting with '-' opens a new item, following lines belong to it
+            spans = []
+            item_start = body_start
+            for token in KACLTokenizer.tokenize(source, pos=body_start, endpos=body_end):
+                if token.kind() == KACLToken.LIST_ITEM:
+                    spans.append((item_start, token.start()))
+                    item_start = token.start()+1
+            spans.append((item_start, body_end))
+            spans = [KACLParser.strip(source, start, end) for start, end in spans]
+            self.__items = [source[start:end] for start, end in spans if start < end]
         return self.__items
 
+    def is_modified(self):
+        """Checks if items were added after the section was parsed"""
+        return self.__dirty
+
     def add(self, item):
         self.items().append(item)
+        self.__dirty = True
@@ -0,0 +1,54 @@
+import json
+
+from .exception import KACLException
+
+DEFAULT_SOCKET = '.kacl.sock'
+
+
+class KACLClient:
+    """Sends requests to a KACLServer"""
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=None):
+        self.__socket_path = socket_path
+        self.__timeout = timeout
+
+    def is_running(self):
+        """Checks if a daemon answers on the socket
+
+        Returns:
+            [bool] -- true if the daemon is running
+        """
+        try:
+            return self.request('ping') == 'pong'
+        except (OSError, KACLException):
+            return False
+
+    def request(self, command, **arguments):
+        """Sends a request and waits for the response. Raises an OSError if no daemon is
+        listening and a KACLException if the daemon reports an error.
+
+        Arguments:
+            command {[str]} -- name of the command
+
+        Returns:
+            [object] -- result of the command
+        """
+        # only loaded when a daemon is used
+        import socket
+
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError('Unix domain sockets are not supported on this platform.')
+
+        request = dict(arguments, command=command)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self.__timeout)
+            connection.connect(self.__socket_path)
+            connection.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            with connection.makefile('rb') as f:
+                line = f.readline()
+
+        if not line:
+            raise ConnectionError(f"The kacl daemon on '{self.__socket_path}' closed the connection.")
+        response = json.loads(line)
+        if 'error' in response:
+            raise KACLException(response['error'])
+        return response.get('result')
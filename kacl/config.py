@@ -1,15 +1,19 @@
 import os
-import yaml
+import types
+
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'kacl-default.yml')
 
 class KACLConfig:
+    # config files are only read once per process, user configs are read again when they change
+    __default_config = None
+    __config_files = dict()
+
     def __init__(self, config_file=None):
-        default_config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'kacl-default.yml')
-        self.__config = {}
-        with open(default_config_file, 'r') as df:
-            self.__config = yaml.safe_load(df)
+        if KACLConfig.__default_config is None:
+            KACLConfig.__default_config = KACLConfig.__read(DEFAULT_CONFIG_FILE)
+        self.__config = KACLConfig.__thaw(KACLConfig.__default_config)
         if config_file:
-            with open(os.path.expanduser(config_file), 'r') as f:
-                KACLConfig.merge(self.__config, yaml.safe_load(f))
+            KACLConfig.merge(self.__config, KACLConfig.__thaw(KACLConfig.__load(config_file)))
 
         self.__config = self.__config.get('kacl',{})
 
@@ -29,8 +33,61 @@ class KACLConfig:
         self.links_unreleased_changes_template = self.__config.get('links',{}).get('unreleased_changes_template')
         self.links_initial_version_template = self.__config.get('links',{}).get('initial_version_template')
         self.post_release_version_prefix = self.__config.get('extension', {}).get('post_release_version_prefix')
+        self.cache_enabled = self.__config.get('cache', {}).get('enabled')
+        self.cache_directory = self.__config.get('cache', {}).get('directory')
+
+    def checksum(self):
+        """Returns a checksum over all settings that influence parsing and validation
+
+        Returns:
+            [str] -- hex digest of the current settings
+        """
+        import hashlib
+        import json
+
+        settings = {k: v for k, v in vars(self).items() if not k.startswith('_')
+                    and k not in ['changelog_file_path', 'cache_enabled', 'cache_directory']}
+        return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()
 
 
+    @staticmethod
+    def __load(config_file):
+        """returns the content of a user config file, memoized by path, modification time and size"""
+        path = os.path.abspath(os.path.expanduser(config_file))
+        stat = os.stat(path)
+        # the size catches edits within the timestamp resolution of the filesystem
+        signature = (stat.st_mtime_ns, stat.st_size)
+        entry = KACLConfig.__config_files.get(path)
+        if entry is None or entry[0] != signature:
+            entry = (signature, KACLConfig.__read(path))
+            KACLConfig.__config_files[path] = entry
+        return entry[1]
+
+    @staticmethod
+    def __read(config_file):
+        import yaml
+
+        with open(config_file, 'r') as f:
+            return KACLConfig.__freeze(yaml.safe_load(f))
+
+    @staticmethod
+    def __freeze(value):
+        """converts a loaded config into an immutable structure that can be shared by all instances"""
+        if isinstance(value, dict):
+            return types.MappingProxyType({k: KACLConfig.__freeze(v) for k, v in value.items()})
+        if isinstance(value, list):
+            return tuple(KACLConfig.__freeze(x) for x in value)
+        return value
+
+    @staticmethod
+    def __thaw(value):
+        """returns a mutable copy of a frozen config"""
+        if isinstance(value, types.MappingProxyType):
+            return {k: KACLConfig.__thaw(v) for k, v in value.items()}
+        if isinstance(value, tuple):
+            return [KACLConfig.__thaw(x) for x in value]
+        return value
+
     @staticmethod
     def merge(a, b, path=None):
         """ merge two dictionaries
@@ -1,219 +1,82 @@
+import bisect
 import datetime
-import re
 import semver
 import os
-import git
 
 from .element import KACLElement
 from .version import KACLVersion
 from .parser import KACLParser
+from .tokenizer import KACLToken, KACLTokenizer
 from .config import KACLConfig
 from .link_provider import LinkProvider
-from .validation import KACLValidation
+from .rules import KACLRules
 from .exception import KACLException
 
-WINDOWS_LINE_ENDING = r'\r\n'
-UNIX_LINE_ENDING = r'\n'
+WINDOWS_LINE_ENDING = '\r\n'
+UNIX_LINE_ENDING = '\n'
 
 class KACLDocument:
-    def __init__(self, data="", headers=[], versions=[], link_references=None, config=KACLConfig()):
+    def __init__(self, data="", headers=[], versions=[], link_references=None, config=None):
         self.__data = data
         self.__headers = headers
         self.__versions = versions
         self.__link_references = link_references
         if not self.__link_references:
             self.__link_references = dict()
+        self.__link_reference_begin = None
+        self.__modification_count = 0
+        self.__validation = None
+        self.__validation_modification_count = None
+        self.__version_index = None
+        self.__semver_index = None
         self.config = config
+        # the elements were changed after they were parsed from 'data'
+        self.__source_modified = False
+        for v in self.__versions:
+            v.set_document(self)
+
+    @property
+    def config(self):
+        # the default config is only loaded when it is needed
+        if self.__config is None:
+            self.__config = KACLConfig()
+        return self.__config
+
+    @config.setter
+    def config(self, config):
+        self.__config = config
+        self.mark_modified(content=False)
+
+    def mark_modified(self, versions=False, content=True):
+        """Marks the document as modified, which invalidates the memoized validation result.
+        This is done automatically by all modifying methods of the document and its versions.
 
-    def validate(self):
-        """Validates the current changelog and returns KACLValidation object containing all information
+        Keyword Arguments:
+            versions {[bool]} -- versions were added, removed or renamed, which invalidates the version index (default: {False})
+            content {[bool]} -- the elements no longer match the parsed text, false if only the config changed (default: {True})
+        """
+        self.__modification_count += 1
+        if content:
+            self.__source_modified = True
+        if versions:
+            self.__version_index = None
+            self.__semver_index = None
+
+    def validate(self, profile=False, jobs=1):
+        """Validates the current changelog and returns KACLValidation object containing all information.
+        The result is memoized until the document is modified.
+
+        Keyword Arguments:
+            profile {[bool]} -- collect timing statistics of all rules in KACLRules (default: {False})
+            jobs {[int]} -- number of processes validating versions, 0 uses all cpus (default: {1})
 
         Returns:
             [KACLValidation] -- object holding all error information
         """
-        validation = KACLValidation()
-        # 1. assert only one header and starts on first line
-        if len(self.__headers) == 0:
-            validation.add_error(
-                line=None,
-                line_number=None,
-                error_message="No 'Changelog' header found.")
-
-            # we can stop here already
-            return validation
-        else:
-            if self.header().raw() != self.header().raw().lstrip():
-                validation.add_error(
-                    line=None,
-                    line_number=None,
-                    error_message="Changelog header not placed on first line.")
-
-        if len(self.__headers) > 1:
-            for header in self.__headers[1:]:
-                validation.add_error(
-                    line=header.raw(),
-                    line_number=header.line_number(),
-                    error_message="Unexpected additional top-level heading found.",
-                    start_character_pos=0,
-                    end_character_pos=len(header.raw())
-                )
-
-        # 1.1 assert header title is in allowed list of header titles
-        if self.header().title() not in self.config.allowed_header_titles:
-            header = self.header()
-            start_pos = header.raw().find(header.title())
-            end_pos = start_pos+len(header.title())
-            validation.add_error(
-                line=header.raw(),
-                line_number=header.line_number(),
-                error_message=f"Header title not valid. Options are [{','.join(self.config.allowed_header_titles)}]",
-                start_character_pos=start_pos,
-                end_character_pos=end_pos
-            )
-
-        # 1.2 assert default content is in the header section
-        for default_line in self.config.default_content:
-            if default_line not in self.header().body().replace('\n', ' '):
-                header = self.header()
-                start_pos = header.raw().find(header.title())
-                end_pos = start_pos+len(header.title())
-                validation.add_error(
-                    line=header.raw(),
-                    line_number=header.line_number(),
-                    error_message=f"Missing default content '{default_line}'",
-                    start_character_pos=start_pos,
-                    end_character_pos=end_pos
-                )
-
-        # 2. assert 'unreleased' version is available
-        # if self.get('Unreleased') == None:
-        #     validation.add_error(
-        #         line=None,
-        #         line_number=None,
-        #         error_message="'Unreleased' section is missing from the Changelog"
-        #     )
-
-        # 3. assert versions in valid format
-        versions = self.versions()
-        for v in versions:
-            if "Unreleased" != v.version():
-                raw = v.raw()
-                regex = KACLParser.semver_regex
-                regex_error = r'#\s+(.*)\s+'
-                if v.link():
-                    regex = f'#\\s+\\[{KACLParser.semver_regex}\\]'
-                    regex_error = r'#\s+\[(.*)\]'
-                if not KACLParser.parse_sem_ver(raw, regex):
-                    start_pos = 0
-                    end_pos = 0
-                    m = re.match(regex_error, raw)
-                    if m:
-                        start_pos = raw.find(m.group(1))
-                        end_pos = start_pos+len(m.group(1))
-                    validation.add_error(
-                        line=raw,
-                        line_number=v.line_number(),
-                        error_message=f"Version is not a valid semantic version.",
-                        start_character_pos=start_pos,
-                        end_character_pos=end_pos
-                    )
-
-        # 3.1 assert versions in descending order
-        for i in range(len(versions)-1):
-            try:
-                v0 = versions[i]
-                v1 = versions[i+1]
-                if semver.VersionInfo.compare(v0.version(), v1.version()) < 1:
-                    validation.add_error(
-                        line=v1.raw(),
-                        line_number=v1.line_number(),
-                        error_message="Versions are not in descending order.",
-                        start_character_pos=0,
-                        end_character_pos=len(v1.raw())
-                    )
-            except:
-                pass
-
-        # 3.2 assert versions have a valid date
-        for v in versions:
-            if "Unreleased" != v.version():
-                if not v.date() or len(v.date()) < 1:
-                    validation.add_error(
-                        line=v.raw(),
-                        line_number=v.line_number(),
-                        error_message="Versions need to be decorated with a release date in the following format 'YYYY-MM-DD'",
-                        start_character_pos=0,
-                        end_character_pos=len(v.raw())
-                    )
-                if v.date() and not re.match(r'\d\d\d\d-[0-1][0-9]-[0-3][0-9]', v.date()):
-                    start_pos = v.raw().find(v.date())
-                    end_pos = start_pos+len(v.date())
-                    validation.add_error(
-                        line=v.raw(),
-                        line_number=v.line_number(),
-                        error_message="Date does not match format 'YYYY-MM-DD'",
-                        start_character_pos=start_pos,
-                        end_character_pos=end_pos
-                    )
-
-        # 3.3 check that only allowed sections are in the version
-            sections = v.sections()
-            for title, element in sections.items():
-                if title not in self.config.allowed_version_sections:
-                    start_pos = element.raw().find(title)
-                    end_pos = start_pos+len(title)
-                    validation.add_error(
-                        line=element.raw(),
-                        line_number=element.line_number(),
-                        error_message=f'"{title}" is not a valid section for a version. Options are [{",".join( self.config.allowed_version_sections)}]',
-                        start_character_pos=start_pos,
-                        end_character_pos=end_pos
-                    )
-        # 3.4 check that only list elements are in the sections
-                # 3.4.1 bring everything into a single line
-                body = element.body()
-                body_clean = re.sub(r'\n\s+', '', body)
-                lines = body_clean.split('\n\n')
-                non_list_lines = [x for x in lines if not x.strip(
-                ).startswith('-') and len(x.strip()) > 0]
-                if len(non_list_lines) > 0:
-                    validation.add_error(
-                        line=body.strip(),
-                        line_number=element.line_number(),
-                        error_message='Section does contain more than only listings.'
-                    )
-        # 3.5 make sure that every version that has content has it's content in a section
-            if len(v.sections()) == 0 and len(v.body().strip()) != 0:
-                validation.add_error(
-                    line=v.raw(),
-                    line_number=v.line_number(),
-                    error_message=f'Version "{v.version()}" has change elements outside of a change section.'
-                )
-
-        # 3.6 Check that a link exists for linked versions
-            if '[' in v.raw() and ']' in v.raw() and not v.has_link_reference():
-                validation.add_error(
-                    line=v.raw(),
-                    line_number=v.line_number(),
-                    error_message=f'Version "{v.version()}" is linked, but no link reference found in changelog file.',
-                    start_character_pos=v.raw().find('['),
-                    end_character_pos=v.raw().find(']')
-                )
-
-        # 4 link references
-        # 4.1 check that there are only linked references
-        version_strings = [v.version() for v in versions]
-        for v, link in self.__link_references.items():
-            if v not in version_strings:
-                validation.add_error(
-                    line=link.raw(),
-                    line_number=link.line_number(),
-                    error_message=f"Link not referenced anywhere in the document",
-                    start_character_pos=0,
-                    end_character_pos=len(link.raw())
-                )
-
-        return validation
+        if profile or self.__validation is None or self.__validation_modification_count != self.__modification_count:
+            self.__validation = KACLRules.validate(self, profile=profile, jobs=jobs)
+            self.__validation_modification_count = self.__modification_count
+        return self.__validation
 
     def is_valid(self):
         """Checks if the current changelog is valid
@@ -248,7 +111,9 @@ class KACLDocument:
         unreleased_version = self.get('Unreleased')
         if unreleased_version == None:
             unreleased_version = KACLVersion(version="Unreleased")
+            unreleased_version.set_document(self)
             self.__versions.insert(0, unreleased_version)
+            self.mark_modified(versions=True)
         unreleased_version.add(section.capitalize(), data)
 
     def release(self, version=None, link=None, auto_link=False, increment=None):
@@ -263,7 +128,7 @@ class KACLDocument:
         if increment:
             v = self.current_version()
             if v:
-                sv = semver.VersionInfo.parse(v)
+                sv = self.get(v).semver()
                 if 'post' == increment:
                     sv = sv.bump_prerelease(token='post')
                 elif 'patch' == increment:
@@ -290,9 +155,9 @@ class KACLDocument:
         # check if new version is greater than the last one
         #   1. there has to be an 'unreleased' section
         #   2. All other versions are in descending order
-        version_list = self.versions()
+        version_list = self.__versions
         if len(version_list) > 1: # versions[0] --> unreleased
-            last_version = semver.VersionInfo.parse(version_list[1].version())
+            last_version = version_list[1].semver()
 
             last_version_base = semver.VersionInfo(major=last_version.major, minor=last_version.minor, patch=last_version.patch)
             future_version_base = semver.VersionInfo(major=future_version.major, minor=future_version.minor, patch=future_version.patch)
@@ -333,6 +198,9 @@ class KACLDocument:
                                                   title=version, body=link),
                                               date=datetime.datetime.now().strftime("%Y-%m-%d"),
                                               sections=unreleased_version.sections()))
+        self.__versions[0].set_document(self)
+        self.__versions[1].set_document(self)
+        self.mark_modified(versions=True)
 
         if auto_link:
             link_provider = self.__get_link_provider()
@@ -354,19 +222,197 @@ class KACLDocument:
                     else:
                         self.__versions[i].set_link( link_provider.initial_version(**fargs) )
 
+    def apply_edit(self, start_line, end_line, text):
+        """Replaces the lines 'start_line' to 'end_line' with 'text' and re-parses only the
+        versions touched by the edit. All other elements are kept and their line numbers
+        shifted. Edits that touch the top-level heading, link references or add/remove
+        top-level headings trigger a full parse.
+
+        Documents modified in memory, i.e. by 'add' or 'release', are serialized and parsed
+        again first, so line numbers refer to the output of kacl.dump.
+
+        Arguments:
+            start_line {[int]} -- first line to replace (starting at 1)
+            end_line {[int]} -- last line to replace, use 'start_line-1' to insert in front of 'start_line'
+            text {[str]} -- new content of the lines, empty to delete them
+        """
+        if self.__source_modified:
+            from .serializer import KACLMarkdownSerializer
+
+            self.__reload(KACLDocument.parse(KACLMarkdownSerializer().serialize(self)))
+
+        lines = str(self.__data).split('\n')
+        if start_line < 1 or start_line > len(lines)+1 or end_line < start_line-1 or end_line > len(lines):
+            raise KACLException(f"Invalid line range {start_line}-{end_line} for a changelog with {len(lines)} lines.")
+
+        text = text.replace(WINDOWS_LINE_ENDING, UNIX_LINE_ENDING)
+        replacement = text.split('\n') if len(text) else []
+        if len(text) and text.endswith('\n'):
+            replacement.pop()
+        removed = lines[start_line-1:end_line]
+        delta = len(replacement) - len(removed)
+        lines[start_line-1:end_line] = replacement
+        data = '\n'.join(lines)
+
+        first, last = self.__versions_in_range(start_line, end_line)
+        if first is None or not self.__is_local_edit(removed) or not self.__is_local_edit(replacement):
+            self.__reload(KACLDocument.parse(data))
+            return
+
+        # the edited region spans all touched versions
+        region_begin = self.__versions[first].line_number()
+        if last+1 < len(self.__versions):
+            region_end = self.__versions[last+1].line_number()-1
+        elif self.__link_reference_begin is not None:
+            region_end = self.__link_reference_begin-1
+        else:
+            region_end = len(lines)-delta
+
+        # text in front of the first heading belongs to the preceding version
+        heading = None
+        if region_begin <= region_end+delta:
+            heading = next(KACLTokenizer.tokenize(lines[region_begin-1]), None)
+        if heading is None or heading.kind() != KACLToken.HEADING or heading.depth() != 2:
+            if first == 0:
+                self.__reload(KACLDocument.parse(data))
+                return
+            first -= 1
+            region_begin = self.__versions[first].line_number()
+
+        # top-level headings inside versions reach into the following versions
+        for header in self.__headers:
+            if region_begin <= header.line_number() <= region_end:
+                self.__reload(KACLDocument.parse(data))
+                return
+
+        # new versions reference the new text of the document
+        region_start = sum(len(x)+1 for x in lines[:region_begin-1])
+        region_end_pos = region_start + len('\n'.join(lines[region_begin-1:region_end+delta]))
+        tokens = KACLTokenizer.tokenize(data, pos=region_start, endpos=region_end_pos, line_offset=region_begin-1)
+        versions = [KACLVersion(element=x) for x in KACLParser.parse_headings(data, tokens, 2, 2, endpos=region_end_pos)]
+        for v in versions:
+            v.set_link(self.__link_references.get(v.version(), None))
+
+        # shift everything behind the edited region
+        if delta:
+            for v in self.__versions[last+1:]:
+                v.set_line_number(v.line_number()+delta)
+            for element in list(self.__link_references.values()) + self.__headers:
+                if element.line_number() is not None and element.line_number() > end_line:
+                    element.set_line_number(element.line_number()+delta)
+            if self.__link_reference_begin is not None:
+                self.__link_reference_begin += delta
+
+        for v in versions:
+            v.set_document(self)
+        self.__versions[first:last+1] = versions
+        self.__data = data
+        self.mark_modified(versions=True)
+        self.__source_modified = False
+
+    def __versions_in_range(self, start_line, end_line):
+        """returns the indices of the first and last version touched by an edit, (None, None)
+        if the edit is not limited to versions"""
+        if not len(self.__versions) or self.__versions[0].line_number() is None:
+            return None, None
+        if self.__link_reference_begin is not None and max(start_line, end_line) >= self.__link_reference_begin:
+            return None, None
+
+        # inserted lines are appended to the line in front of them
+        anchor = start_line if end_line >= start_line else start_line-1
+        version_lines = [v.line_number() for v in self.__versions]
+        first = bisect.bisect_right(version_lines, anchor)-1
+        last = bisect.bisect_right(version_lines, max(end_line, anchor))-1
+        if first < 0:
+            return None, None
+        return first, last
+
+    def __is_local_edit(self, lines):
+        """checks that lines neither contain top-level headings nor link references"""
+        text = '\n'.join(lines)
+        for token in KACLTokenizer.tokenize(text):
+            if token.kind() == KACLToken.LINK_REFERENCE:
+                return False
+            if token.kind() == KACLToken.HEADING and token.depth() == 1:
+                return False
+        return True
+
+    def __reload(self, document):
+        self.__data = document.__data
+        self.__headers = document.__headers
+        self.__versions = document.__versions
+        self.__link_references = document.__link_references
+        self.__link_reference_begin = document.__link_reference_begin
+        for v in self.__versions:
+            v.set_document(self)
+        self.mark_modified(versions=True)
+        self.__source_modified = False
+
     def get(self, version):
         """Returns the selected version
 
         Arguments:
-            version {[str]} -- semantic versioning string
+            version {[str]} -- semantic versioning string or 'unreleased'
 
         Returns:
             [KACLVersion] -- version object with all information
         """
-        res = [x for x in self.__versions if x.version()
-               and version.capitalize() == x.version()]
-        if res and len(res):
-            return res[0]
+        return self.__get_version_index().get(KACLVersion.normalize(version))
+
+    def get_many(self, versions):
+        """Returns the selected versions
+
+        Arguments:
+            versions {[list]} -- semantic versioning strings
+
+        Returns:
+            [list] -- KACLVersion for every requested version, None if it does not exist
+        """
+        index = self.__get_version_index()
+        return [index.get(KACLVersion.normalize(x)) for x in versions]
+
+    def versions_between(self, lower, upper):
+        """Returns all versions from 'lower' up to and including 'upper'. Versions that
+        are not valid semantic versions, i.e. 'Unreleased', are not part of the result.
+
+        Arguments:
+            lower {[str]} -- lowest semantic version to include
+            upper {[str]} -- highest semantic version to include
+
+        Returns:
+            [list] -- KACLVersions ordered from the highest to the lowest version
+        """
+        lower = semver.VersionInfo.parse(lower)
+        upper = semver.VersionInfo.parse(upper)
+
+        keys, versions = self.__get_semver_index()
+        begin = bisect.bisect_left(keys, lower)
+        end = bisect.bisect_right(keys, upper)
+        return versions[begin:end][::-1]
+
+    def __get_version_index(self):
+        """returns a dictionary mapping normalized version strings to versions, the first
+        version wins on duplicates"""
+        if self.__version_index is None:
+            index = dict()
+            for v in self.__versions:
+                if v.version():
+                    index.setdefault(KACLVersion.normalize(v.version()), v)
+            self.__version_index = index
+        return self.__version_index
+
+    def __get_semver_index(self):
+        """returns the parsed semantic versions in ascending order and the versions in the same order"""
+        if self.__semver_index is None:
+            index = []
+            for v in self.__get_version_index().values():
+                try:
+                    index.append((v.semver(), v))
+                except (TypeError, ValueError):
+                    continue
+            index.sort(key=lambda x: x[0])
+            self.__semver_index = ([x[0] for x in index], [x[1] for x in index])
+        return self.__semver_index
 
     def current_version(self):
         """returns the current version (last released)
@@ -374,46 +420,55 @@ class KACLDocument:
         Returns:
             [str] -- latest released version, None if none is available
         """
-        version_list = self.versions()
+        version_list = self.__versions
         for v in version_list:
             if v.version().lower() != 'unreleased':
                 return v.version()
 
-    def generate_links(self, host_url=None, compare_versions_template=None, unreleased_changes_template=None, initial_version_template=None):
+    def generate_links(self, host_url=None, compare_versions_template=None, unreleased_changes_template=None, initial_version_template=None, incremental=False):
         """automatically generates links for all versions
 
-        Returns: None
+        Keyword Arguments:
+            incremental {[bool]} -- only set links of versions without a link or whose link was generated from the templates, but does not match them anymore. Other links are kept (default: {False})
+
+        Returns:
+            [int] -- number of versions that got a new link
         """
         link_provider = self.__get_link_provider(host_url=host_url,
                                                  compare_versions_template=compare_versions_template,
                                                  unreleased_changes_template=unreleased_changes_template,
                                                  initial_version_template=initial_version_template)
 
-        versions = self.versions()
-        if len(versions) > 1:
-            for i in range(len(versions)-1):
-                fargs = {
-                    "version": versions[i].version(),
-                    "previous_version": versions[i+1].version(),
-                    "latest_version": self.current_version()
-                }
-
-                if 'unreleased' in versions[i].version().lower():
-                    versions[i].set_link( link_provider.unreleased_changes(**fargs) )
-                else:
-                    versions[i].set_link( link_provider.compare_versions(**fargs) )
-            versions[-1].set_link( link_provider.initial_version(**fargs) )
-        elif len(versions) == 1:
-            fargs = {
-                "version": versions[0].version(),
-                "latest_version": self.current_version()
-            }
-
-            if 'unreleased' in versions[0].version().lower():
-                versions[0].set_link( link_provider.initial_version(version="master") )
+        versions = self.__versions
+        latest_version = self.current_version()
+        templates = [link_provider.compare_versions_template,
+                     link_provider.unreleased_changes_template,
+                     link_provider.initial_version_template]
+        compare_versions, unreleased_changes, initial_version = [link_provider.compiled(x)[0] for x in templates]
+
+        updated = 0
+        for i, version in enumerate(versions):
+            version_string = version.version()
+            previous_version = versions[i+1].version() if i+1 < len(versions) else None
+            unreleased = 'unreleased' in version_string.lower()
+            if unreleased and len(versions) == 1:
+                link = initial_version("master", None, None)
+            elif unreleased and previous_version is not None:
+                link = unreleased_changes(version_string, previous_version, latest_version)
+            elif previous_version is not None:
+                link = compare_versions(version_string, previous_version, latest_version)
             else:
-                versions[0].set_link( link_provider.initial_version(**fargs) )
-
+                link = initial_version(version_string, previous_version, latest_version)
+
+            if incremental:
+                current = version.link() if version.has_link_reference() else None
+                if current == link:
+                    continue
+                if current is not None and not any(link_provider.is_generated(x, current) for x in templates):
+                    continue
+            version.set_link(link)
+            updated += 1
+        return updated
 
     def header(self):
         """Gives access to the top level heading element
@@ -424,6 +479,22 @@ class KACLDocument:
         if self.__headers and len(self.__headers) > 0:
             return self.__headers[0]
 
+    def headers(self):
+        """Gives access to all top level heading elements, only the first one is valid
+
+        Returns:
+            [list] -- list of KACLElements
+        """
+        return self.__headers
+
+    def link_references(self):
+        """Returns all link references of the changelog
+
+        Returns:
+            [dict] -- KACLElements holding the link as body by version
+        """
+        return self.__link_references
+
     def title(self):
         """Returns the title of the changelog
 
@@ -435,12 +506,70 @@ class KACLDocument:
         return None
 
     def versions(self):
-        """Returns a list of all available versions
+        """Returns a list of all available versions. The list is a copy, use the modifying
+        methods of the document to add or remove versions.
 
         Returns:
             [list] -- list of KACLVersions
         """
-        return self.__versions
+        return list(self.__versions)
+
+    def convert_to_dict(self, offsets=False):
+        """Converts the parsed document into a dictionary that can be stored as json.
+        The source text of the document is not part of it.
+
+        Keyword Arguments:
+            offsets {[bool]} -- elements parsed from the source text only store their offsets,
+                                the source text has to be passed to 'from_dict' (default: {False})
+
+        Returns:
+            [dict] -- dictionary holding all parsed elements
+        """
+        # offsets into mapped sources are byte offsets, which cannot be restored from text
+        source = self.__data if offsets and isinstance(self.__data, str) else None
+        return {
+            "headers": [x.convert_to_dict(source) for x in self.__headers],
+            "versions": [x.convert_to_dict(source) for x in self.__versions],
+            "link_references": [x.convert_to_dict(source) for x in self.__link_references.values()],
+            "link_reference_begin": self.__link_reference_begin
+        }
+
+    @staticmethod
+    def from_dict(document_map, data="", config=None):
+        """Restores a document created with 'convert_to_dict'
+
+        Arguments:
+            document_map {[dict]} -- dictionary created by 'convert_to_dict'
+
+        Keyword Arguments:
+            data {[str]} -- source text the document was parsed from (default: {""})
+            config {[KACLConfig]} -- config of the document (default: {KACLConfig()})
+
+        Returns:
+            [KACLDocument] -- restored document
+        """
+        data = data.replace(WINDOWS_LINE_ENDING, UNIX_LINE_ENDING) if data else ""
+
+        link_references = dict()
+        for link_map in document_map['link_references']:
+            link_reference = KACLElement.from_dict(link_map, source=data)
+            link_references[link_reference.title()] = link_reference
+
+        versions = []
+        for version_map in document_map['versions']:
+            version = KACLVersion.from_dict(version_map, source=data)
+            # share the link elements with the document like 'parse' does
+            if version.version() in link_references:
+                version.set_link(link_references[version.version()])
+            versions.append(version)
+
+        document = KACLDocument(data=data,
+                                headers=[KACLElement.from_dict(x, source=data) for x in document_map['headers']],
+                                versions=versions,
+                                link_references=link_references,
+                                config=config)
+        document.__link_reference_begin = document_map['link_reference_begin']
+        return document
 
     @staticmethod
     def init():
@@ -457,33 +586,46 @@ The format is based on [Keep a Changelog](https://keepachangelog.com/en/1.0.0/),
         """Parses a given text object and returns the KACLDocument
 
         Arguments:
-            data {[str]} -- markdown text holding the changelog
+            data {[str]} -- markdown text holding the changelog, or a KACLMappedSource
 
         Returns:
             [KACLDocument] -- object holding all information
         """
 
-        data_lf = data.replace(WINDOWS_LINE_ENDING, UNIX_LINE_ENDING)
+        # mapped sources convert line endings per slice
+        data_lf = data.replace(WINDOWS_LINE_ENDING, UNIX_LINE_ENDING) if isinstance(data, str) else data
+
+        # tokenize the whole document once, everything below works on the tokens. Only the
+        # tokens of top-level and version headings and link references are kept, sections
+        # and items are tokenized again when they are accessed
+        tokens = [x for x in KACLTokenizer.tokenize(data_lf)
+                  if x.kind() == KACLToken.LINK_REFERENCE or (x.kind() == KACLToken.HEADING and x.depth() <= 2)]
 
-        # First check if there are link references and split the document where they begin
-        link_reference_begin, link_references = KACLParser.parse_link_references(data_lf)
+        # link references are collected from the whole document, the changelog body ends
+        # in front of the first one
+        first_link, link_references = KACLParser.parse_link_references(data_lf, tokens)
+        link_reference_begin = None
+        changelog_end = len(data_lf)
+        if first_link is not None:
+            link_reference_begin = first_link.line_number()
+            changelog_end = max(first_link.start()-1, 0)
 
-        changelog_body = data_lf
-        if link_reference_begin:
-            changelog_body = data_lf[:link_reference_begin]
+        body_tokens = [x for x in tokens if x.end() <= changelog_end]
 
         # read header
-        headers = KACLParser.parse_header(changelog_body, 1, 2)
+        headers = KACLParser.parse_headings(data_lf, body_tokens, 1, 2, endpos=changelog_end)
 
         # read versions
-        versions = KACLParser.parse_header(changelog_body, 2, 2)
+        versions = KACLParser.parse_headings(data_lf, body_tokens, 2, 2, endpos=changelog_end)
         versions = [KACLVersion(element=x) for x in versions]
 
         # set link references into versions if available
         for v in versions:
             v.set_link(link_references.get(v.version(), None))
 
-        return KACLDocument(data=data, headers=headers, versions=versions, link_references=link_references)
+        document = KACLDocument(data=data_lf, headers=headers, versions=versions, link_references=link_references)
+        document.__link_reference_begin = link_reference_begin
+        return document
 
 
     def __get_link_provider(self, host_url=None, compare_versions_template=None, unreleased_changes_template=None, initial_version_template=None):
@@ -497,6 +639,7 @@ The format is based on [Keep a Changelog](https://keepachangelog.com/en/1.0.0/),
                 host_url = os.environ['CI_PROJECT_URL']
             else:
                 try:
+                    import git
                     repo = git.Repo(os.getcwd())
                     remote = repo.remote()
                     for url in remote.urls:
@@ -1,18 +1,121 @@
 class KACLElement:
-    def __init__(self, raw="", title="", body="", line_number=None):
-        self.__raw = raw
-        self.__title = title
-        self.__body = body
+    # elements reference their text as (start, end) offsets into a source text that is
+    # shared by all elements of a document and only slice it on access
+    __slots__ = ('__source', '__raw_start', '__raw_end', '__title_start', '__title_end',
+                 '__body_start', '__body_end', '__line_number')
+
+    def __init__(self, raw="", title="", body="", line_number=None, source=None, spans=None):
+        """Creates an element either from its texts or from offsets into a source text
+
+        Keyword Arguments:
+            raw {[str]} -- complete heading line (default: {""})
+            title {[str]} -- title of the heading (default: {""})
+            body {[str]} -- text following the heading (default: {""})
+            line_number {[int]} -- line of the heading (default: {None})
+            source {[str]} -- text the element was parsed from, replaces raw, title and body (default: {None})
+            spans {[tuple]} -- (start, end) offsets of raw, title and body within 'source' (default: {None})
+        """
+        if source is None:
+            source = ""
+            spans = []
+            for text in [raw, title, body]:
+                # None is kept, i.e. for links without url
+                if text is None:
+                    spans.append((None, None))
+                else:
+                    spans.append((len(source), len(source)+len(text)))
+                    source += text
+        self.__source = source
+        (self.__raw_start, self.__raw_end), (self.__title_start, self.__title_end), (self.__body_start, self.__body_end) = spans
         self.__line_number = line_number
 
     def line_number(self):
         return self.__line_number
 
+    def set_line_number(self, line_number):
+        self.__line_number = line_number
+
     def title(self):
-        return self.__title
+        return self.__slice(self.__title_start, self.__title_end)
 
     def body(self):
-        return self.__body
+        return self.__slice(self.__body_start, self.__body_end)
 
     def raw(self):
-        return self.__raw
\ No newline at end of file
+        return self.__slice(self.__raw_start, self.__raw_end)
+
+    def __slice(self, start, end):
+        if start is not None:
+            return self.__source[start:end]
+
+    def source(self):
+        return self.__source
+
+    def spans(self):
+        return ((self.__raw_start, self.__raw_end), (self.__title_start, self.__title_end), (self.__body_start, self.__body_end))
+
+    def __getstate__(self):
+        # only the part of the source covered by the element is pickled
+        state = dict()
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if name.startswith('__'):
+                    name = f'_{cls.__name__}{name}'
+                if hasattr(self, name):
+                    state[name] = getattr(self, name)
+
+        if not isinstance(self.__source, str):
+            # mapped sources are not sent along, the element keeps its decoded texts
+            element = KACLElement(raw=self.raw(), title=self.title(), body=self.body())
+            state['_KACLElement__source'] = element.__source
+            for name, span in zip(['raw', 'title', 'body'], element.spans()):
+                state[f'_KACLElement__{name}_start'], state[f'_KACLElement__{name}_end'] = span
+            return state
+
+        spans = [x for x in self.spans() if x[0] is not None]
+        begin = min([x[0] for x in spans], default=0)
+        end = max([x[1] for x in spans], default=0)
+        state['_KACLElement__source'] = self.__source[begin:end]
+        for name in ['raw', 'title', 'body']:
+            if state[f'_KACLElement__{name}_start'] is not None:
+                state[f'_KACLElement__{name}_start'] -= begin
+                state[f'_KACLElement__{name}_end'] -= begin
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def convert_to_dict(self, source=None):
+        """Converts the element into a dictionary
+
+        Keyword Arguments:
+            source {[str]} -- elements parsed from this text only store their offsets (default: {None})
+
+        Returns:
+            [dict] -- dictionary that can be restored with 'from_dict'
+        """
+        if source is not None and self.__source is source:
+            return {
+                "spans": self.spans(),
+                "line_number": self.__line_number
+            }
+
+        return {
+            "raw": self.raw(),
+            "title": self.title(),
+            "body": self.body(),
+            "line_number": self.__line_number
+        }
+
+    @staticmethod
+    def from_dict(element_map, source=None):
+        if 'spans' in element_map:
+            return KACLElement(source=source,
+                               spans=[tuple(x) for x in element_map['spans']],
+                               line_number=element_map['line_number'])
+
+        return KACLElement(raw=element_map['raw'],
+                           title=element_map['title'],
+                           body=element_map['body'],
+                           line_number=element_map['line_number'])
@@ -4,27 +4,40 @@
 
 import sys
 import os
+import glob
 import kacl
 import click
 import json
 import semver
 import traceback
-import git
 from datetime import datetime
 
 from kacl.exception import KACLException
 
-def load_changelog(ctx):
+def get_config_file_path(ctx):
     config_file_path = ctx.obj['config']
-    file = ctx.obj['file']
 
     default_config_path = os.path.join(os.getcwd(), '.kacl.yml')
     if not config_file_path and os.path.exists(default_config_path):
-        kacl_config = kacl.KACLConfig(default_config_path)
-    elif config_file_path:
-        kacl_config = kacl.KACLConfig(config_file_path)
+        return default_config_path
+    return config_file_path
+
+def load_config(ctx):
+    config_file_path = get_config_file_path(ctx)
+    if config_file_path:
+        return kacl.KACLConfig(config_file_path)
     else:
-        kacl_config = kacl.KACLConfig()
+        return kacl.KACLConfig()
+
+def use_cache(ctx, kacl_config):
+    use_cache = ctx.obj.get('cache')
+    if use_cache is None:
+        use_cache = kacl_config.cache_enabled
+    return use_cache
+
+def load_changelog_config(ctx):
+    file = ctx.obj['file']
+    kacl_config = load_config(ctx)
 
     if file:
         kacl_config.changelog_file_path = file
@@ -34,13 +47,70 @@ def load_changelog(ctx):
                     f"{kacl_config.changelog_file_path} not found")
         sys.exit(1)
 
+    return kacl_config
+
+def load_changelog(ctx, mmap=False):
+    kacl_config = load_changelog_config(ctx)
+
     # read the changelog
-    kacl_changelog = kacl.load(kacl_config.changelog_file_path)
+    if use_cache(ctx, kacl_config):
+        from kacl.cache import KACLCache
+
+        cache = KACLCache(kacl_config.cache_directory)
+        with open(kacl_config.changelog_file_path, 'r') as f:
+            data = f.read()
+        key = cache.key(data, kacl_config)
+        kacl_changelog, validation = cache.get(key, data=data, config=kacl_config)
+        if kacl_changelog is None:
+            kacl_changelog = kacl.parse(data)
+            cache.put(key, kacl_changelog)
+        ctx.obj['cache_entry'] = (cache, key, validation)
+    else:
+        kacl_changelog = kacl.load(kacl_config.changelog_file_path, mmap=mmap)
     kacl_changelog.config = kacl_config
 
     # share the objects
     return kacl_changelog
 
+def validate_changelog(ctx, kacl_changelog, jobs=1):
+    cache_entry = ctx.obj.get('cache_entry')
+    if cache_entry:
+        cache, key, validation = cache_entry
+        if validation is None:
+            validation = kacl_changelog.validate(jobs=jobs)
+            cache.put(key, kacl_changelog, validation)
+        return validation
+
+    return kacl_changelog.validate(jobs=jobs)
+
+def forward(ctx, command, **arguments):
+    """Sends a command to a running 'kacl-cli serve' daemon
+
+    Commands are only forwarded if a socket is given explicitly with '--socket' or
+    KACL_SOCKET, a socket that merely exists is never used.
+
+    Returns:
+        [tuple] -- (True, result) if the daemon answered, (False, None) if no daemon is used or running
+    """
+    socket_path = ctx.obj.get('socket')
+    if not socket_path or not os.path.exists(socket_path):
+        return False, None
+
+    # only loaded when a daemon is used
+    from kacl.client import KACLClient
+
+    kacl_config = load_changelog_config(ctx)
+    config_file_path = get_config_file_path(ctx)
+    try:
+        result = KACLClient(socket_path).request(command,
+                                                 file=os.path.abspath(kacl_config.changelog_file_path),
+                                                 config=os.path.abspath(config_file_path) if config_file_path else None,
+                                                 **arguments)
+    except OSError:
+        # the daemon is not running anymore, handle the command locally
+        return False, None
+    return True, result
+
 def prefixed_environ():
     return dict((("${}".format(key), value) for key, value in os.environ.items()))
 
@@ -48,13 +118,17 @@ def prefixed_environ():
 @click.option('-v', '--version', is_flag=True, required=False, help='Prints the current version of the CLI.')
 @click.option('-c', '--config', required=False, default=None, type=click.Path(exists=False, dir_okay=False, file_okay=True), help='Path to kacl config file.', show_default=True)
 @click.option('-f', '--file', required=False, default=None, type=click.Path(exists=True, dir_okay=False, file_okay=True), help='Path to changelog file.', show_default=True)
+@click.option('--cache/--no-cache', default=None, help='Reuse parse and validation results of unchanged changelogs stored in the cache directory.')
+@click.option('--socket', 'socket_path', required=False, default=None, envvar='KACL_SOCKET', type=click.Path(dir_okay=False), help='Socket of a running \'kacl-cli serve\' daemon that current, get, verify, add and release are forwarded to. Commands are only forwarded if it is given.')
 @click.pass_context
-def cli(ctx, version=None, config=None, file=None):
+def cli(ctx, version=None, config=None, file=None, cache=None, socket_path=None):
     if ctx.obj is None:
         ctx.obj = dict()
 
     ctx.obj['config'] = config
     ctx.obj['file'] = file
+    ctx.obj['cache'] = cache
+    ctx.obj['socket'] = socket_path
 
     # if --version was given, print version and exit directly
     if version:
@@ -70,17 +144,20 @@ def cli(ctx, version=None, config=None, file=None):
 def add(ctx, section, message, modify):
     """Adds a given message to a specified unreleased section. Use '--modify' to directly modify the changelog file.
     """
+    forwarded, kacl_changelog_content = forward(ctx, 'add', section=section, message=message, modify=modify)
+    if forwarded:
+        if not modify:
+            click.echo(kacl_changelog_content)
+        return
+
     kacl_changelog = load_changelog(ctx)
 
     # add changes to changelog
     kacl_changelog.add(section=section, data=message)
-    kacl_changelog_content = kacl.dump(kacl_changelog)
     if modify:
-        with open(kacl_changelog.config.changelog_file_path, 'w') as f:
-            f.write(kacl_changelog_content)
-        f.close()
+        kacl.save(kacl_changelog, kacl_changelog.config.changelog_file_path)
     else:
-        click.echo(kacl_changelog_content)
+        click.echo(kacl.dump(kacl_changelog))
 
 
 @cli.command()
@@ -88,9 +165,16 @@ def add(ctx, section, message, modify):
 def current(ctx):
     """Returns the current version from the Changelog.
     """
-    kacl_changelog = load_changelog(ctx)
+    forwarded, current_version = forward(ctx, 'current')
+    if forwarded:
+        click.echo(current_version)
+        return
+
+    kacl_config = load_changelog_config(ctx)
 
-    current_version = kacl_changelog.current_version()
+    # only read the version headings up to the first released version
+    with open(kacl_config.changelog_file_path, 'r') as f:
+        current_version = kacl.KACLReader(f).current_version()
     click.echo(current_version)
 
 
@@ -100,13 +184,16 @@ def current(ctx):
 def get(ctx, version):
     """Returns a given version from the Changelog.
     """
-    kacl_changelog = load_changelog(ctx)
+    forwarded, kacl_changelog_content = forward(ctx, 'get', version=version)
+    if not forwarded:
+        kacl_config = load_changelog_config(ctx)
 
-    # add changes to changelog
-    kacl_version = kacl_changelog.get(version)
+        # only read the requested version and its link
+        with open(kacl_config.changelog_file_path, 'r') as f:
+            kacl_version = kacl.KACLReader(f).find(version)
+        kacl_changelog_content = kacl.dump(kacl_version) if kacl_version else None
 
-    if kacl_version:
-        kacl_changelog_content = kacl.dump(kacl_version)
+    if kacl_changelog_content:
         click.echo(kacl_changelog_content)
     else:
         click.echo(click.style("Error: ", fg='red') +
@@ -128,65 +215,143 @@ def link(ctx):
 @click.option('--compare-versions-template', required=False, default=None, type=str, help='Template string for version comparison link.', show_default=True)
 @click.option('--unreleased-changes-template', required=False, default=None, type=str, help='Template string for unreleased changes link.', show_default=True)
 @click.option('--initial-version-template', required=False, default=None, type=str, help='Template string for initial version link.', show_default=True)
-def generate(ctx, modify, host_url, compare_versions_template, unreleased_changes_template, initial_version_template):
+@click.option('--incremental', is_flag=True, help='Only generate missing links and links created from the templates that are out of date, keep all other links.')
+def generate(ctx, modify, host_url, compare_versions_template, unreleased_changes_template, initial_version_template, incremental):
     kacl_changelog = load_changelog(ctx)
 
     kacl_changelog.generate_links(host_url=host_url,
                                   compare_versions_template=compare_versions_template,
                                   unreleased_changes_template=unreleased_changes_template,
-                                  initial_version_template=initial_version_template)
+                                  initial_version_template=initial_version_template,
+                                  incremental=incremental)
 
-    kacl_changelog_content = kacl.dump(kacl_changelog)
     if modify:
-        with open(kacl_changelog.config.changelog_file_path, 'w') as f:
-            f.write(kacl_changelog_content)
-        f.close()
+        kacl.save(kacl_changelog, kacl_changelog.config.changelog_file_path)
     else:
-        click.echo(kacl_changelog_content)
+        click.echo(kacl.dump(kacl_changelog))
 
 
 @cli.command()
 @click.pass_context
 @click.option('--json', 'as_json', is_flag=True, help='Print validation output as json.')
-def verify(ctx, as_json):
+@click.option('--profile-rules', is_flag=True, help='Print the number of calls and the run time of every validation rule to stderr.')
+@click.option('-j', '--jobs', type=click.IntRange(min=0), default=None, help='Number of processes validating versions (or files with --glob) in parallel, 0 uses all cpus. [default: 1, all cpus with --glob]')
+@click.option('--glob', 'pattern', required=False, default=None, type=str, help="Verify all changelogs matching a glob pattern (i.e. 'packages/*/CHANGELOG.md').")
+def verify(ctx, as_json, profile_rules, jobs, pattern):
     """Verifies if the changelog is in "keep-a-changelog" format.
     Use '--json' get JSON formatted output that can be easier integrated into CI workflows.
-    Exit code is the number of identified errors.
+    Exit code is the number of identified errors, at most 255.
     """
-    kacl_changelog = load_changelog(ctx)
-    kacl_changelog_filepath = os.path.basename(kacl_changelog.config.changelog_file_path)
+    if pattern:
+        verify_files(ctx, pattern, as_json, profile_rules, jobs)
+        return
 
-    valid = kacl_changelog.is_valid()
-    validation = kacl_changelog.validate()
+    forwarded = False
+    if not profile_rules and jobs is None:
+        forwarded, validation_map = forward(ctx, 'verify')
+
+    if forwarded:
+        validation = kacl.KACLValidation.from_dict(validation_map)
+        kacl_changelog_filepath = os.path.basename(load_changelog_config(ctx).changelog_file_path)
+    else:
+        if jobs is None:
+            jobs = 1
+
+        # the changelog is only read, so it can be mapped into memory
+        kacl_changelog = load_changelog(ctx, mmap=True)
+        kacl_changelog_filepath = os.path.basename(kacl_changelog.config.changelog_file_path)
+
+        if profile_rules:
+            kacl.KACLRules.reset_statistics()
+            validation = kacl_changelog.validate(profile=True, jobs=jobs)
+        else:
+            validation = validate_changelog(ctx, kacl_changelog, jobs=jobs)
+    valid = validation.is_valid()
     if as_json:
         validation_map = validation.convert_to_dict()
         click.echo(json.dumps(validation_map, sort_keys=True, indent=4))
     else:
-        for error in validation.errors():
-            start_char_pos, end_char_pos = error.position()
-
-            char_indicator = start_char_pos
-            if start_char_pos == None:
-                char_indicator = 0
-
-            click.echo(click.style(
-                kacl_changelog_filepath + ':' +
-                f'{error.line_number()}:{char_indicator}: ' +
-                click.style('error: ', fg='red') +
-                error.error_message(), bold=True))
-
-            if error.line():
-                click.echo(error.line())
-                if start_char_pos != None and end_char_pos != None:
-                    mark_length = end_char_pos-start_char_pos-1
-                    click.echo(' '*start_char_pos + click.style('^' + '~'*(mark_length), fg="green"))
+        print_validation_errors(kacl_changelog_filepath, validation)
         if not valid:
             click.echo(f'{len(validation.errors())} error(s) generated.')
         else:
             click.secho('Success', fg='green')
 
+    if profile_rules:
+        print_rule_profile()
+
     if not valid:
-        sys.exit(len(validation.errors()))
+        sys.exit(exit_status(len(validation.errors())))
+
+
+def exit_status(error_count):
+    """exit statuses are truncated to 8 bits, 256 errors would otherwise exit with 0"""
+    return min(error_count, 255)
+
+
+def verify_files(ctx, pattern, as_json, profile_rules, jobs):
+    if profile_rules:
+        raise click.UsageError("'--profile-rules' cannot be combined with '--glob'.")
+
+    files = sorted(glob.glob(pattern, recursive=True))
+    if not files:
+        click.echo(click.style("Error: ", fg='red') + f"no changelog matches '{pattern}'")
+        sys.exit(1)
+
+    kacl_config = load_config(ctx)
+    cache = None
+    if use_cache(ctx, kacl_config):
+        from kacl.cache import KACLCache
+
+        cache = KACLCache(kacl_config.cache_directory)
+    validations = kacl.verify_many(files, config=kacl_config, jobs=jobs, cache=cache)
+
+    error_count = 0
+    for validation in validations.values():
+        if not validation.is_valid():
+            error_count += len(validation.errors())
+
+    if as_json:
+        validation_map = {file: validation.convert_to_dict() for file, validation in validations.items()}
+        click.echo(json.dumps(validation_map, sort_keys=True, indent=4))
+    else:
+        for file, validation in validations.items():
+            print_validation_errors(file, validation)
+        if error_count:
+            click.echo(f'{error_count} error(s) generated in {len(files)} file(s).')
+        else:
+            click.secho(f'Success ({len(files)} file(s))', fg='green')
+
+    if error_count:
+        sys.exit(exit_status(error_count))
+
+
+def print_validation_errors(filepath, validation):
+    for error in validation.errors():
+        start_char_pos, end_char_pos = error.position()
+
+        char_indicator = start_char_pos
+        if start_char_pos == None:
+            char_indicator = 0
+
+        click.echo(click.style(
+            filepath + ':' +
+            f'{error.line_number()}:{char_indicator}: ' +
+            click.style('error: ', fg='red') +
+            error.error_message(), bold=True))
+
+        if error.line():
+            click.echo(error.line())
+            if start_char_pos != None and end_char_pos != None:
+                mark_length = end_char_pos-start_char_pos-1
+                click.echo(' '*start_char_pos + click.style('^' + '~'*(mark_length), fg="green"))
+
+
+def print_rule_profile():
+    rules = sorted(kacl.KACLRules.rules(), key=lambda x: x.elapsed(), reverse=True)
+    click.echo(f'{"rule":<8}{"scope":<10}{"calls":>10}{"time [ms]":>12}  description', err=True)
+    for rule in rules:
+        click.echo(f'{rule.rule_id():<8}{rule.scope():<10}{rule.calls():>10}{rule.elapsed()*1000:>12.3f}  {rule.description()}', err=True)
 
 
 @cli.command()
@@ -212,6 +377,19 @@ def release(ctx, version, modify, link, auto_link, commit, no_commit, commit_mes
 
         kacl-cli release major|minor|patch|post
     """
+    # commits and tags are created by the client, everything else can be done by a daemon
+    kacl_config = load_changelog_config(ctx)
+    if not (modify and not no_commit and (commit or tag or kacl_config.git_create_commit or kacl_config.git_create_tag)):
+        try:
+            forwarded, kacl_changelog_content = forward(ctx, 'release', version=version, link=link, auto_link=auto_link, modify=modify)
+        except KACLException as e:
+            click.echo(click.style("Error: ", fg='red') + str(e))
+            sys.exit(1)
+        if forwarded:
+            if not modify:
+                click.echo(kacl_changelog_content)
+            return
+
     kacl_changelog = load_changelog(ctx)
     kacl_config = kacl_changelog.config
 
@@ -251,14 +429,9 @@ def release(ctx, version, modify, link, auto_link, commit, no_commit, commit_mes
     # get the new version
     new_version = kacl_changelog.current_version()
 
-    # dump the content
-    kacl_changelog_content = kacl.dump(kacl_changelog)
-
     # check if we should modify the file
     if modify:
-        with open(kacl_changelog.config.changelog_file_path, 'w') as f:
-            f.write(kacl_changelog_content)
-        f.close()
+        kacl.save(kacl_changelog, kacl_changelog.config.changelog_file_path)
 
         if not no_commit:
             if commit or tag or kacl_config.git_create_commit or kacl_config.git_create_tag:
@@ -277,6 +450,8 @@ def release(ctx, version, modify, link, auto_link, commit, no_commit, commit_mes
                 tag_name        = tag_name if tag_name != None else kacl_config.git_tag_name
                 tag_description = tag_description if tag_description != None else kacl_config.git_tag_description
 
+                import git
+
                 repo = None
                 try:
                     repo = git.Repo(os.getcwd())
@@ -299,7 +474,29 @@ def release(ctx, version, modify, link, auto_link, commit, no_commit, commit_mes
                         repo.create_tag(tag_name.format(**vcs_context),
                                         message=tag_description.format(**vcs_context))
     else:
-        click.echo(kacl_changelog_content)
+        click.echo(kacl.dump(kacl_changelog))
+
+
+@cli.command()
+@click.pass_context
+def serve(ctx):
+    """Runs a daemon that keeps parsed changelogs in memory and answers requests on a
+    Unix domain socket. While it runs, current, get, verify, add and release are forwarded
+    to it by all kacl-cli calls using the same '--socket'. Without '--socket' it listens on
+    .kacl.sock next to the changelog.
+    """
+    from kacl.client import DEFAULT_SOCKET
+    from kacl.server import KACLServer
+
+    socket_path = ctx.obj.get('socket')
+    if not socket_path:
+        changelog_file_path = ctx.obj.get('file') or load_config(ctx).changelog_file_path
+        socket_path = os.path.join(os.path.dirname(os.path.abspath(changelog_file_path)), DEFAULT_SOCKET)
+    click.echo(f'Listening on {socket_path}', err=True)
+    try:
+        KACLServer(socket_path).serve_forever()
+    except KeyboardInterrupt:
+        pass
 
 
 @cli.command()
@@ -308,13 +505,10 @@ def new(output_file):
     """Creates a new changelog.
     """
     kacl_changelog = kacl.new()
-    kacl_changelog_content = kacl.dump(kacl_changelog)
     if output_file:
-        with open(output_file, 'w') as f:
-            f.write(kacl_changelog_content)
-        f.close()
+        kacl.save(kacl_changelog, output_file)
     else:
-        click.echo(kacl_changelog_content)
+        click.echo(kacl.dump(kacl_changelog))
 
 
 def start():
@@ -1,40 +1,124 @@
+import functools
 import re
+import string
+
+from .patterns import KACLPatterns
 
 class LinkProvider:
+    FIELDS = ('host', 'version', 'previous_version', 'latest_version')
+
     def __init__(self, host_url=None, compare_versions_template=None, unreleased_changes_template=None, initial_version_template=None):
         self.host_url = self.__sanatize_url(host_url)
         self.compare_versions_template = compare_versions_template
         self.unreleased_changes_template = unreleased_changes_template
         self.initial_version_template = initial_version_template
+        # (template, host) -> (render function, regex matching rendered links)
+        self.__compiled = dict()
 
     def __sanatize_url(self, url):
         if url:
-            regExpr = r'git@(.*):(.*).git'
-            m = re.search(regExpr, url)
+            m = KACLPatterns.get(KACLPatterns.GIT_REMOTE).search(url)
             if m:
                 return f'https://{m.group(1)}/{m.group(2)}'
         return url
 
     def compare_versions(self, version=None, previous_version=None, latest_version=None):
-        return self.compare_versions_template.format(
-            host=self.host_url,
-            version=version,
-            previous_version=previous_version,
-            latest_version=latest_version,
-        )
+        return self.render(self.compare_versions_template, version, previous_version, latest_version)
 
     def initial_version(self, version=None, previous_version=None, latest_version=None):
-        return self.initial_version_template.format(
-            host=self.host_url,
-            version=version,
-            previous_version=previous_version,
-            latest_version=latest_version,
-        )
+        return self.render(self.initial_version_template, version, previous_version, latest_version)
 
     def unreleased_changes(self, version=None, previous_version=None, latest_version=None):
-        return self.unreleased_changes_template.format(
-            host=self.host_url,
-            version=version,
-            previous_version=previous_version,
-            latest_version=latest_version,
-        )
\ No newline at end of file
+        return self.render(self.unreleased_changes_template, version, previous_version, latest_version)
+
+    def render(self, template, version=None, previous_version=None, latest_version=None):
+        """Fills a link template, templates are compiled on first use
+
+        Arguments:
+            template {[str]} -- python format string using the fields 'host', 'version', 'previous_version' and 'latest_version'
+
+        Returns:
+            [str] -- link
+        """
+        return self.compiled(template)[0](version, previous_version, latest_version)
+
+    def is_generated(self, template, link):
+        """Checks if a link could have been rendered from a template with the current host,
+        no matter for which versions
+
+        Arguments:
+            template {[str]} -- link template
+            link {[str]} -- link to check
+
+        Returns:
+            [bool] -- true if the link matches the template
+        """
+        regex = self.compiled(template)[1]
+        return regex is not None and link is not None and regex.fullmatch(link) is not None
+
+    def compiled(self, template):
+        """Returns the render function and regex of a template, see LinkProvider.compile"""
+        compiled = self.__compiled.get((template, self.host_url))
+        if compiled is None:
+            compiled = LinkProvider.compile(template, self.host_url)
+            self.__compiled[(template, self.host_url)] = compiled
+        return compiled
+
+    @staticmethod
+    def compile(template, host_url=None):
+        """Compiles a link template into a render function taking the version, the previous
+        version and the latest version, and a regex matching all links rendered by it. The
+        host is filled in right away and the other fields become positional arguments.
+        Templates accessing attributes or items of fields are rendered with keyword
+        arguments. Templates with format specs or conversions on fields other than the
+        host have no regex.
+
+        Arguments:
+            template {[str]} -- python format string
+
+        Keyword Arguments:
+            host_url {[str]} -- value of the 'host' field (default: {None})
+
+        Returns:
+            [tuple] -- render function and compiled regex or None
+        """
+        def escape(text):
+            return text.replace('{', '{{').replace('}', '}}')
+
+        compiled = []
+        regex = []
+        for literal, field, format_spec, conversion in string.Formatter().parse(template):
+            compiled.append(escape(literal))
+            if regex is not None:
+                regex.append(re.escape(literal))
+            if field is None:
+                continue
+            if field not in LinkProvider.FIELDS or (format_spec and '{' in format_spec):
+                return functools.partial(LinkProvider.__render_keywords, template, host_url), None
+
+            if field == 'host':
+                value = format(string.Formatter().convert_field(host_url, conversion), format_spec or '')
+                compiled.append(escape(value))
+                if regex is not None:
+                    regex.append(re.escape(value))
+                continue
+
+            # versions rendered with format specs or conversions are not matched
+            if format_spec or conversion:
+                regex = None
+
+            # version, previous_version and latest_version are positional arguments 0, 1 and 2
+            compiled.append('{' + str(LinkProvider.FIELDS.index(field)-1) +
+                            (f'!{conversion}' if conversion else '') +
+                            (f':{format_spec}' if format_spec else '') + '}')
+            if regex is not None:
+                regex.append('.+?')
+
+        return ''.join(compiled).format, re.compile(''.join(regex)) if regex is not None else None
+
+    @staticmethod
+    def __render_keywords(template, host_url, version, previous_version, latest_version):
+        return template.format(host=host_url,
+                               version=version,
+                               previous_version=previous_version,
+                               latest_version=latest_version)
@@ -0,0 +1,430 @@
+import json
+import os
+import sys
+import threading
+import urllib.parse
+
+import click
+
+from .config import KACLConfig
+from .document import KACLDocument
+from .exception import KACLException
+from .rules import KACLRule, KACLRuleContext, KACLRules
+from .validation import KACLValidation, KACLValidationError
+
+
+class KACLIncrementalValidator:
+    """Validates a document again and again while it is edited. Version and section rules
+    only run for versions that were parsed again since the last run or whose previous
+    version changed, the errors of all other versions are reused and moved to their new
+    line numbers. Document and link rules always run.
+    """
+    def __init__(self):
+        # id(version) -> (version, previous version, line number, errors)
+        self.__versions = dict()
+
+    def validate(self, document, cancelled=None):
+        """Validates the document with all registered rules
+
+        Arguments:
+            document {[KACLDocument]} -- document to validate
+
+        Keyword Arguments:
+            cancelled {[callable]} -- checked between versions, the validation stops if it returns true (default: {None})
+
+        Returns:
+            [KACLValidation] -- object holding all error information, None if the validation was cancelled
+        """
+        validation = KACLValidation()
+        context = KACLRuleContext(document)
+
+        for rule in KACLRules.rules(KACLRule.DOCUMENT):
+            if rule.run(context, validation) is False:
+                return validation
+
+        version_rules = KACLRules.rules(KACLRule.VERSION)
+        section_rules = KACLRules.rules(KACLRule.SECTION)
+        versions = dict()
+        previous_version = None
+        for version in document.versions():
+            if cancelled and cancelled():
+                return None
+
+            entry = self.__versions.get(id(version))
+            if entry and entry[0] is version and entry[1] is previous_version:
+                errors = KACLIncrementalValidator.__shift(entry[3], version.line_number()-entry[2])
+            else:
+                version_validation = KACLValidation()
+                KACLRules.validate_versions(context, version_validation, [version], previous_version,
+                                            version_rules, section_rules)
+                errors = version_validation.errors()
+
+            versions[id(version)] = (version, previous_version, version.line_number(), errors)
+            validation.errors().extend(errors)
+            previous_version = version
+        self.__versions = versions
+
+        link_rules = KACLRules.rules(KACLRule.LINK)
+        for version_string, link in document.link_references().items():
+            for rule in link_rules:
+                rule.run(context, validation, version_string, link)
+
+        return validation
+
+    @staticmethod
+    def __shift(errors, delta):
+        """moves errors of a version by 'delta' lines"""
+        if not delta:
+            return errors
+        return [KACLValidationError(line=x.line(),
+                                    line_number=x.line_number()+delta if x.line_number() is not None else None,
+                                    start_character_pos=x.position()[0],
+                                    end_character_pos=x.position()[1],
+                                    error_message=x.error_message(),
+                                    severity=x.severity(),
+                                    rule_id=x.rule_id()) for x in errors]
+
+
+class KACLScheduler:
+    """Runs tasks after a delay. Scheduling a task under a key that already has a pending
+    task replaces it. Running tasks get a function telling them if they were cancelled by
+    a newer task in the meantime, so they can stop early. Without a delay tasks run
+    immediately in the calling thread.
+    """
+    def __init__(self, delay=0.2):
+        self.__delay = delay
+        self.__lock = threading.Lock()
+        self.__generations = dict()
+        self.__timers = dict()
+
+    def schedule(self, key, task):
+        """Schedules 'task(cancelled)' to run after the delay
+
+        Arguments:
+            key {[object]} -- tasks with the same key cancel each other
+            task {[callable]} -- called with a function returning true once the task is cancelled
+        """
+        generation = self.cancel(key)
+        if not self.__delay or self.__delay <= 0:
+            task(lambda: False)
+            return
+
+        timer = threading.Timer(self.__delay, self.__run, args=(key, generation, task))
+        timer.daemon = True
+        with self.__lock:
+            self.__timers[key] = timer
+        timer.start()
+
+    def cancel(self, key):
+        """Cancels the pending and the running task of a key
+
+        Returns:
+            [int] -- generation of the next task of the key
+        """
+        with self.__lock:
+            generation = self.__generations.get(key, 0)+1
+            self.__generations[key] = generation
+            timer = self.__timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        return generation
+
+    def close(self):
+        """Cancels all tasks"""
+        with self.__lock:
+            keys = list(self.__generations.keys())
+        for key in keys:
+            self.cancel(key)
+
+    def __run(self, key, generation, task):
+        with self.__lock:
+            if self.__generations.get(key) != generation:
+                return
+            self.__timers.pop(key, None)
+        task(lambda: self.__generations.get(key) != generation)
+
+
+class KACLLanguageServer:
+    """Language server publishing the validation errors of changelogs as diagnostics.
+    Messages are JSON-RPC 2.0 objects framed by a 'Content-Length' header as defined by
+    the Language Server Protocol. Documents are synchronized incrementally, every change is
+    applied with KACLDocument.apply_edit and validated after a short delay.
+    """
+    PARSE_ERROR = -32700
+    METHOD_NOT_FOUND = -32601
+    INTERNAL_ERROR = -32603
+
+    # text document sync kind 'Incremental'
+    INCREMENTAL_SYNC = 2
+
+    SEVERITIES = {KACLRule.ERROR: 1, KACLRule.WARNING: 2}
+
+    def __init__(self, reader, writer, delay=0.2, config=None):
+        self.__reader = reader
+        self.__writer = writer
+        self.__config = config
+        self.__scheduler = KACLScheduler(delay)
+        self.__write_lock = threading.Lock()
+        # uri -> (lock, state)
+        self.__documents = dict()
+        self.__shutdown = False
+        self.__exit = False
+        self.__requests = {
+            'initialize': self.__initialize,
+            'shutdown': self.__shutdown_request,
+        }
+        self.__notifications = {
+            'exit': self.__exit_notification,
+            'textDocument/didOpen': self.__did_open,
+            'textDocument/didChange': self.__did_change,
+            'textDocument/didClose': self.__did_close,
+        }
+
+    def serve(self):
+        """Handles messages until the client sends 'exit' or closes the input
+
+        Returns:
+            [int] -- exit code, 0 if the server was shut down before
+        """
+        try:
+            while not self.__exit:
+                try:
+                    message = self.read_message()
+                except ValueError as e:
+                    self.write_message({'jsonrpc': '2.0', 'id': None,
+                                        'error': {'code': KACLLanguageServer.PARSE_ERROR, 'message': str(e)}})
+                    continue
+                if message is None:
+                    break
+                self.handle(message)
+        finally:
+            self.__scheduler.close()
+        return 0 if self.__shutdown else 1
+
+    def handle(self, message):
+        """Handles a single request or notification and writes the response of requests"""
+        method = message.get('method')
+        if 'id' not in message:
+            handler = self.__notifications.get(method)
+            if handler:
+                handler(message.get('params') or {})
+            return
+
+        handler = self.__requests.get(method)
+        response = {'jsonrpc': '2.0', 'id': message['id']}
+        if handler is None:
+            response['error'] = {'code': KACLLanguageServer.METHOD_NOT_FOUND, 'message': f"Unknown method '{method}'."}
+        else:
+            try:
+                response['result'] = handler(message.get('params') or {})
+            except (KACLException, KeyError, ValueError, OSError) as e:
+                response['error'] = {'code': KACLLanguageServer.INTERNAL_ERROR, 'message': str(e)}
+        self.write_message(response)
+
+    def read_message(self):
+        """Reads the next message, returns None at the end of the input"""
+        length = None
+        while True:
+            line = self.__reader.readline()
+            if not line:
+                return None
+            line = line.strip()
+            if not line:
+                break
+            name, _, value = line.decode('ascii').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        if length is None:
+            raise ValueError('Message without Content-Length header.')
+        return json.loads(self.__reader.read(length).decode('utf-8'))
+
+    def write_message(self, message):
+        body = json.dumps(message).encode('utf-8')
+        with self.__write_lock:
+            self.__writer.write(f'Content-Length: {len(body)}\r\n\r\n'.encode('ascii') + body)
+            self.__writer.flush()
+
+    def validate(self, uri, cancelled=None):
+        """Validates an open document and publishes its diagnostics unless the validation
+        was cancelled by a newer change
+        """
+        entry = self.__documents.get(uri)
+        if entry is None:
+            return
+        lock, state = entry
+        with lock:
+            validation = state['validator'].validate(state['document'], cancelled=cancelled)
+            if validation is None or (cancelled and cancelled()):
+                return
+            diagnostics = [KACLLanguageServer.diagnostic(x, state['lines']) for x in validation.errors()]
+            version = state['version']
+        self.__publish(uri, diagnostics, version)
+
+    @staticmethod
+    def diagnostic(error, lines):
+        """Converts a validation error into a LSP diagnostic. Errors without character
+        positions cover their whole line, errors without line number the first line.
+
+        Arguments:
+            error {[KACLValidationError]} -- error to convert
+            lines {[list]} -- lines of the validated document
+
+        Returns:
+            [dict] -- LSP diagnostic
+        """
+        line = error.line_number()-1 if error.line_number() else 0
+        text = lines[line] if line < len(lines) else ''
+        start, end = error.position()
+        start = min(start, len(text)) if start is not None and start > 0 else 0
+        end = min(end, len(text)) if end is not None and end > start else len(text)
+        diagnostic = {
+            'range': {
+                'start': {'line': line, 'character': KACLLanguageServer.__utf16_offset(text, start)},
+                'end': {'line': line, 'character': KACLLanguageServer.__utf16_offset(text, end)},
+            },
+            'severity': KACLLanguageServer.SEVERITIES.get(error.severity(), 1),
+            'source': 'kacl',
+            'message': error.error_message(),
+        }
+        if error.rule_id():
+            diagnostic['code'] = error.rule_id()
+        return diagnostic
+
+    def __publish(self, uri, diagnostics, version=None):
+        params = {'uri': uri, 'diagnostics': diagnostics}
+        if version is not None:
+            params['version'] = version
+        self.write_message({'jsonrpc': '2.0', 'method': 'textDocument/publishDiagnostics', 'params': params})
+
+    def __initialize(self, params):
+        from . import __version__
+
+        return {
+            'capabilities': {
+                'textDocumentSync': {'openClose': True, 'change': KACLLanguageServer.INCREMENTAL_SYNC},
+            },
+            'serverInfo': {'name': 'kacl-lsp', 'version': __version__},
+        }
+
+    def __shutdown_request(self, params):
+        self.__shutdown = True
+        self.__scheduler.close()
+
+    def __exit_notification(self, params):
+        self.__exit = True
+
+    def __did_open(self, params):
+        document = params['textDocument']
+        text = document['text'].replace('\r\n', '\n')
+        kacl_document = KACLDocument.parse(text)
+        kacl_document.config = self.__load_config(document['uri'])
+        state = {
+            'document': kacl_document,
+            'lines': text.split('\n'),
+            'version': document.get('version'),
+            'validator': KACLIncrementalValidator(),
+        }
+        self.__documents[document['uri']] = (threading.Lock(), state)
+        self.__schedule(document['uri'])
+
+    def __did_change(self, params):
+        uri = params['textDocument']['uri']
+        entry = self.__documents.get(uri)
+        if entry is None:
+            return
+
+        # a running validation stops at the next version and releases the document
+        self.__scheduler.cancel(uri)
+        lock, state = entry
+        with lock:
+            for change in params['contentChanges']:
+                self.__apply_change(state, change)
+            state['version'] = params['textDocument'].get('version')
+        self.__schedule(uri)
+
+    def __did_close(self, params):
+        uri = params['textDocument']['uri']
+        self.__scheduler.cancel(uri)
+        if self.__documents.pop(uri, None) is not None:
+            self.__publish(uri, [])
+
+    def __schedule(self, uri):
+        self.__scheduler.schedule(uri, lambda cancelled: self.validate(uri, cancelled))
+
+    def __apply_change(self, state, change):
+        """applies a full or ranged content change to the lines and the document"""
+        text = change['text'].replace('\r\n', '\n')
+        lines = state['lines']
+        if 'range' not in change:
+            state['lines'] = text.split('\n')
+            config = state['document'].config
+            state['document'] = KACLDocument.parse(text)
+            state['document'].config = config
+            return
+
+        start_line, start_index = KACLLanguageServer.__position(lines, change['range']['start'])
+        end_line, end_index = KACLLanguageServer.__position(lines, change['range']['end'])
+        replacement = lines[start_line][:start_index] + text + lines[end_line][end_index:]
+        lines[start_line:end_line+1] = replacement.split('\n')
+
+        try:
+            state['document'].apply_edit(start_line+1, end_line+1, replacement + '\n')
+        except KACLException:
+            config = state['document'].config
+            state['document'] = KACLDocument.parse('\n'.join(lines))
+            state['document'].config = config
+
+    def __load_config(self, uri):
+        """uses the config of the server or the closest '.kacl.yml' above the document"""
+        if self.__config:
+            return KACLConfig(self.__config)
+
+        url = urllib.parse.urlparse(uri)
+        if url.scheme == 'file':
+            directory = os.path.dirname(urllib.parse.unquote(url.path))
+            while True:
+                config_file = os.path.join(directory, '.kacl.yml')
+                if os.path.exists(config_file):
+                    return KACLConfig(config_file)
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+                directory = parent
+        return KACLConfig()
+
+    @staticmethod
+    def __utf16_offset(text, index):
+        """LSP counts characters in UTF-16 code units"""
+        return len(text[:index].encode('utf-16-le')) // 2
+
+    @staticmethod
+    def __position(lines, position):
+        """returns the line and string index of a position, positions after the last line are the end of the document"""
+        if position['line'] >= len(lines):
+            return len(lines)-1, len(lines[-1])
+        line = position['line']
+        return line, KACLLanguageServer.__character_index(lines[line], position['character'])
+
+    @staticmethod
+    def __character_index(text, offset):
+        units = 0
+        for index, character in enumerate(text):
+            if units >= offset:
+                return index
+            units += 2 if ord(character) > 0xFFFF else 1
+        return len(text)
+
+
+@click.command()
+@click.option('-c', '--config', required=False, type=click.Path(exists=True), help='Path to kacl config file used for all changelogs. By default the closest .kacl.yml is used.')
+@click.option('--delay', default=0.2, type=float, show_default=True, help='Seconds without changes before a changelog is validated, 0 validates after every change.')
+def main(config, delay):
+    """Language server publishing the validation errors of changelogs as diagnostics.
+    Speaks the Language Server Protocol on stdin and stdout.
+    """
+    server = KACLLanguageServer(sys.stdin.buffer, sys.stdout.buffer, delay=delay, config=config)
+    sys.exit(server.serve())
+
+
+if __name__ == '__main__':
+    main()
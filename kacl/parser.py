@@ -1,60 +1,128 @@
 from .element import KACLElement
+from .tokenizer import KACLToken, KACLTokenizer
+from .patterns import KACLPatterns, SEMVER_REGEX
 
 import re
 
 class KACLParser:
-    semver_regex = r'(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)(?:-((?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?'
+    semver_regex = SEMVER_REGEX
 
     @staticmethod
-    def parse_header(text, start_depth, end_depth=None, line_offset=0):
+    def parse_header(text, start_depth, end_depth=None, line_offset=0, pos=0, endpos=None):
+        tokens = KACLTokenizer.tokenize(text, pos=pos, endpos=endpos, line_offset=line_offset)
+        return KACLParser.parse_headings(text, tokens, start_depth, end_depth, endpos=endpos)
+
+    @staticmethod
+    def parse_headings(text, tokens, start_depth, end_depth=None, endpos=None):
+        """Builds elements for all headings of 'start_depth'. The body of an element reaches
+        up to the next heading of 'end_depth' or 'endpos'
+
+        Arguments:
+            text {[str]} -- text the tokens were created from
+            tokens {[iterable]} -- KACLTokens in document order
+            start_depth {[int]} -- depth of the headings to create elements for
+
+        Keyword Arguments:
+            end_depth {[int]} -- depth of the headings terminating a body (default: {start_depth})
+            endpos {[int]} -- offset the last body ends at (default: {len(text)})
+
+        Returns:
+            [list] -- list of KACLElements referencing 'text'
+        """
         if not end_depth:
             end_depth = start_depth
+        if endpos is None:
+            endpos = len(text)
 
+        headings = [x for x in tokens if x.kind() == KACLToken.HEADING
+                    and x.depth() in (start_depth, end_depth)]
+
+        # walk backwards so every heading already knows where the following one begins
         elements = []
-        reg_expr_start = r'(\n{depth}|^{depth})\s+?(.*)\n'.format(depth="#"*start_depth)
-        reg_expr_end = r'(\n{depth}|^{depth})\s+?(.*)\n'.format(depth="#"*end_depth)
-        for match in re.finditer(reg_expr_start, text):
-            # find end of section
-            raw = match.group().strip()
-            title = match.group(2).strip()
-            start = match.start()
-            end = match.end()
-            line_number = text[:start].count('\n')+line_offset
-            if match.group()[0] == '\n':
-                line_number += 2
-            else:
-                line_number += 1
-
-            next_match = re.search(reg_expr_end, text[end:])
-            body = None
-            if next_match:
-                body = text[end:next_match.start()+end]
-            else:
-                body = text[end:]
-            elements.append(KACLElement(raw=raw, title=title,
-                                        body=body, line_number=line_number))
+        boundary = endpos
+        for token in reversed(headings):
+            if token.depth() == start_depth:
+                raw = KACLParser.strip(text, token.start(), token.end())
+                title = KACLParser.strip(text, token.start()+start_depth, token.end())
+                body_start = min(token.end()+1, endpos)
+                body = (body_start, max(boundary, body_start))
+                elements.append(KACLElement(source=text, spans=(raw, title, body),
+                                            line_number=token.line_number()))
+            if token.depth() == end_depth:
+                # the body ends in front of the line break preceding the heading
+                boundary = token.start()-1
+        elements.reverse()
 
         return elements
 
     @staticmethod
-    def parse_link_references(text):
+    def parse_link_reference(text, token):
+        """Creates the link reference element for a LINK_REFERENCE token
+
+        Arguments:
+            text {[str]} -- text the token was created from
+            token {[KACLToken]} -- link reference token
+
+        Returns:
+            [KACLElement] -- element with the version as title and the url as body
+        """
+        match = KACLTokenizer.match(KACLPatterns.get(KACLPatterns.LINK_REFERENCE), text, token.start(), token.end())
+        spans = [KACLParser.strip(text, *match.span(x)) for x in range(3)]
+        return KACLElement(source=text, spans=spans, line_number=token.line_number())
+
+    @staticmethod
+    def strip(text, start, end):
+        """Returns the offsets of text[start:end] without leading and trailing whitespace"""
+        if not isinstance(text, str):
+            return text.strip(start, end)
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end-1].isspace():
+            end -= 1
+        return start, end
+
+    @staticmethod
+    def parse_link_references(text, tokens=None):
+        """Collects the link references of a text into an index by version
+
+        Arguments:
+            text {[str]} -- text holding the link references
+
+        Keyword Arguments:
+            tokens {[iterable]} -- tokens of 'text', only LINK_REFERENCE tokens are used (default: {tokenize 'text'})
+
+        Returns:
+            [tuple] -- first LINK_REFERENCE token (None if there is none) and a dict of KACLElements by version
+        """
+        if tokens is None:
+            tokens = KACLTokenizer.tokenize(text)
+
         link_references = dict()
         begin = None
-        reg_expr = r'\n\[(.*)\]:(.*)'
-        for match in re.finditer(reg_expr, text):
-            if begin is None:
-                begin = match.start()
-            version = match.group(1).strip()
-            link = match.group(2).strip()
-            line_number = text[:match.start()].count('\n')+1
-            link_references[version] = KACLElement(raw=match.group().strip(), title=version, body=link, line_number=line_number)
-
+        for token in tokens:
+            if token.kind() == KACLToken.LINK_REFERENCE:
+                if begin is None:
+                    begin = token
+                link_reference = KACLParser.parse_link_reference(text, token)
+                link_references[link_reference.title()] = link_reference
         return begin, link_references
 
+    @staticmethod
+    def parse_version(title):
+        """Returns the version of a version heading title, 'Unreleased' or an empty string"""
+        version = KACLParser.parse_sem_ver(title)
+        if version:
+            return version
+        elif 'unreleased' in title.lower():
+            return "Unreleased"
+        return ""
+
     @staticmethod
     def parse_sem_ver(text, regex=None):
         if regex == None:
-            regex = KACLParser.semver_regex
-        m = re.search(regex, text)
+            regex = KACLPatterns.get(KACLPatterns.SEMVER)
+        elif isinstance(regex, str):
+            regex = re.compile(regex)
+        m = regex.search(text)
         if m:
             return m.group().strip()
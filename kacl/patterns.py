@@ -0,0 +1,58 @@
+import re
+
+SEMVER_REGEX = r'(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)(?:-((?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?'
+
+
+class KACLPatterns:
+    """Registry of all regular expressions used by kacl. Every pattern is compiled once
+    per process on first use and cached by its purpose and heading depth.
+    """
+    SEMVER = 'semver'
+    LINKED_VERSION = 'linked_version'
+    VERSION_TITLE = 'version_title'
+    LINKED_VERSION_TITLE = 'linked_version_title'
+    DATE = 'date'
+    DATE_FORMAT = 'date_format'
+    LINK_REFERENCE = 'link_reference'
+    LINE_CONTINUATION = 'line_continuation'
+    GIT_REMOTE = 'git_remote'
+
+    # '{depth}' is replaced by the heading marker of the requested depth
+    __templates = {
+        SEMVER: SEMVER_REGEX,
+        LINKED_VERSION: r'{depth}\s+\[' + SEMVER_REGEX + r'\]',
+        VERSION_TITLE: r'{depth}\s+(.*)\s+',
+        LINKED_VERSION_TITLE: r'{depth}\s+\[(.*)\]',
+        DATE: r'\d\d\d\d-\d\d-\d\d',
+        DATE_FORMAT: r'\d\d\d\d-[0-1][0-9]-[0-3][0-9]',
+        LINK_REFERENCE: r'\[(.*)\]:(.*)',
+        LINE_CONTINUATION: r'\n\s+',
+        GIT_REMOTE: r'git@(.*):(.*).git',
+    }
+
+    __compiled = dict()
+
+    @staticmethod
+    def get(purpose, depth=None):
+        """Returns the compiled pattern for a given purpose
+
+        Arguments:
+            purpose {[str]} -- one of the purpose constants of this class
+
+        Keyword Arguments:
+            depth {[int]} -- heading depth for heading related patterns (default: {None})
+
+        Returns:
+            [re.Pattern] -- compiled regular expression
+        """
+        key = (purpose, depth)
+        pattern = KACLPatterns.__compiled.get(key)
+        if pattern is None:
+            template = KACLPatterns.__templates[purpose]
+            if depth:
+                template = template.replace('{depth}', '#'*depth)
+            else:
+                template = template.replace('{depth}', '#')
+            pattern = re.compile(template)
+            KACLPatterns.__compiled[key] = pattern
+        return pattern
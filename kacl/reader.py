@@ -0,0 +1,192 @@
+from .exception import KACLException
+from .parser import KACLParser
+from .patterns import KACLPatterns
+from .tokenizer import KACLToken, KACLTokenizer
+from .version import KACLVersion
+
+import re
+
+
+class KACLReader:
+    """Reads the versions of a changelog line by line without loading the whole file.
+    Only the version that is currently read is kept in memory.
+
+    The file has to be opened in text mode with universal newlines (the default of 'open'),
+    which converts CRLF line endings while reading.
+    """
+    # number of characters read at once when looking for a link reference
+    chunk_size = 1 << 20
+
+    def __init__(self, file):
+        self.__file = file
+        self.__line_number = 0
+        # the line that terminated the last version, it has not been handled yet
+        self.__pending = None
+        self.__link_references = None
+
+    def versions(self):
+        """Yields the versions of the changelog in document order. The versions do not have
+        links, use 'link_reference' to look them up.
+
+        Returns:
+            [generator] -- KACLVersions
+        """
+        for _, line_number, text in self.__blocks():
+            yield KACLReader.__create_version(text, line_number)
+
+    def find(self, version):
+        """Returns a single version including its link. Only the headings of the versions in
+        front of it are looked at, their bodies are skipped.
+
+        Arguments:
+            version {[str]} -- semantic versioning string or 'unreleased'
+
+        Returns:
+            [KACLVersion] -- the version, None if it does not exist
+        """
+        version = KACLVersion.normalize(version)
+
+        def wanted(title):
+            title_version = KACLParser.parse_version(title)
+            return len(title_version) > 0 and KACLVersion.normalize(title_version) == version
+
+        for _, line_number, text in self.__blocks(wanted):
+            if text is not None:
+                kacl_version = KACLReader.__create_version(text, line_number)
+                kacl_version.set_link(self.link_reference(kacl_version.version()))
+                return kacl_version
+
+    def current_version(self):
+        """Returns the latest released version by looking only at the version headings
+        up to the first released one
+
+        Returns:
+            [str] -- latest released version, None if none is available
+        """
+        for title, _, _ in self.__blocks(lambda title: False):
+            version = KACLParser.parse_version(title)
+            if version.lower() != 'unreleased':
+                return version
+
+    def __blocks(self, wanted=None):
+        """Splits the changelog into versions. Yields the title, line number and text of every
+        version, the text is only collected if 'wanted' accepts the title (default: all)
+        and is None otherwise.
+        """
+        link_reference_regex = KACLPatterns.get(KACLPatterns.LINK_REFERENCE)
+        heading = None
+        lines = None
+        for line in self.__lines():
+            first = line[:1]
+            if first == '#':
+                depth = len(line) - len(line.lstrip('#'))
+                terminates = depth == 2 and (depth == len(line) or line[depth].isspace())
+            elif first == '[':
+                terminates = link_reference_regex.match(line) is not None
+            else:
+                terminates = False
+
+            if not terminates:
+                # plain text, list items and all other headings belong to the current version
+                if lines is not None:
+                    lines.append(line)
+                continue
+
+            # keep the line for 'link_reference' in case the caller stops reading versions
+            self.__pending = line
+            if heading is not None:
+                # the body ends in front of the line break preceding the next heading
+                text = ''.join(lines) if lines is not None else None
+                yield heading[0], heading[1], text[:-1] if text and text.endswith('\n') else text
+
+            if first == '[':
+                # the changelog ends in front of the first link reference
+                return
+            self.__pending = None
+
+            title = line[2:].strip()
+            heading = (title, self.__line_number)
+            lines = [line] if wanted is None or wanted(title) else None
+
+        if heading is not None:
+            yield heading[0], heading[1], ''.join(lines) if lines is not None else None
+
+    def link_reference(self, version):
+        """Returns the link reference of a version. This reads the rest of the file and only
+        keeps the link of the requested version, so it can only be called for one version and
+        'versions' cannot be continued afterwards.
+
+        Arguments:
+            version {[str]} -- version string
+
+        Returns:
+            [KACLElement] -- link reference, None if the version has no link
+        """
+        if self.__link_references is None:
+            self.__link_references = {version: None}
+            # only lines starting with a reference to the version are looked at
+            candidates = re.compile(r'^\[[^\S\n]*' + re.escape(version) + r'[^\S\n]*\]', re.MULTILINE)
+            for line, line_number in self.__candidates(candidates):
+                token = KACLReader.__classify(line, line_number)
+                if token is not None and token.kind() == KACLToken.LINK_REFERENCE:
+                    link_reference = KACLParser.parse_link_reference(line, token)
+                    # like in KACLDocument.parse the last reference of a version wins
+                    if link_reference.title() == version:
+                        self.__link_references[version] = link_reference
+        elif version not in self.__link_references:
+            raise KACLException("The rest of the changelog has already been read to look up another link reference.")
+        return self.__link_references[version]
+
+    def __lines(self):
+        if self.__pending is not None:
+            line = self.__pending
+            self.__pending = None
+            yield line
+        for line in self.__file:
+            self.__line_number += 1
+            yield line
+
+    def __candidates(self, regex):
+        """Yields the remaining lines matching 'regex' with their line numbers. The file is
+        read in chunks of whole lines instead of line by line.
+        """
+        if self.__pending is not None:
+            line = self.__pending
+            self.__pending = None
+            if regex.match(line):
+                yield line, self.__line_number
+        rest = ''
+        while True:
+            chunk = self.__file.read(KACLReader.chunk_size)
+            if not chunk:
+                break
+            chunk = rest + chunk
+            end = chunk.rfind('\n')+1
+            chunk, rest = chunk[:end], chunk[end:]
+            yield from self.__search(chunk, regex)
+        yield from self.__search(rest, regex)
+
+    def __search(self, chunk, regex):
+        line_number = self.__line_number
+        offset = 0
+        for match in regex.finditer(chunk):
+            line_number += chunk.count('\n', offset, match.start())
+            offset = match.start()
+            end = chunk.find('\n', offset)
+            yield chunk[offset:len(chunk) if end < 0 else end+1], line_number+1
+        self.__line_number += chunk.count('\n')
+        if chunk and not chunk.endswith('\n'):
+            self.__line_number += 1
+
+    @staticmethod
+    def __classify(line, line_number):
+        """returns the heading or link reference token of a single line, None for all other lines"""
+        if line[:1] not in ('#', '['):
+            return None
+        return next(KACLTokenizer.tokenize(line.rstrip('\n'), line_offset=line_number-1), None)
+
+    @staticmethod
+    def __create_version(text, line_number):
+        tokens = KACLTokenizer.tokenize(text, line_offset=line_number-1)
+        element = KACLParser.parse_headings(text, tokens, 2, 2)[0]
+        return KACLVersion(element=element)
@@ -0,0 +1,430 @@
+import os
+import time
+
+from .parser import KACLParser
+from .patterns import KACLPatterns
+from .validation import KACLValidation
+
+
+class KACLRule:
+    DOCUMENT = 'document'
+    VERSION = 'version'
+    SECTION = 'section'
+    LINK = 'link'
+
+    ERROR = 'error'
+    WARNING = 'warning'
+
+    def __init__(self, rule_id, scope, check, severity=ERROR, description=""):
+        self.__rule_id = rule_id
+        self.__scope = scope
+        self.__check = check
+        self.__severity = severity
+        self.__description = description
+        self.reset_statistics()
+
+    def rule_id(self):
+        return self.__rule_id
+
+    def scope(self):
+        return self.__scope
+
+    def severity(self):
+        return self.__severity
+
+    def description(self):
+        return self.__description
+
+    def calls(self):
+        return self.__calls
+
+    def elapsed(self):
+        """accumulated run time of the rule in seconds, only counted while profiling"""
+        return self.__elapsed
+
+    def reset_statistics(self):
+        self.__calls = 0
+        self.__elapsed = 0.0
+
+    def add_statistics(self, calls, elapsed):
+        self.__calls += calls
+        self.__elapsed += elapsed
+
+    def run(self, context, validation, *args, profile=False):
+        """Runs the check of the rule and adds all findings to the validation
+
+        Arguments:
+            context {[KACLRuleContext]} -- information shared by all rules of one validation run
+            validation {[KACLValidation]} -- validation the findings are added to
+            args -- scope dependent arguments of the check
+
+        Keyword Arguments:
+            profile {[bool]} -- count calls and measure the run time (default: {False})
+
+        Returns:
+            [bool] -- False if the validation should not continue
+        """
+        def report(line, line_number, error_message, start_character_pos=None, end_character_pos=None):
+            validation.add_error(line=line,
+                                 line_number=line_number,
+                                 error_message=error_message,
+                                 start_character_pos=start_character_pos,
+                                 end_character_pos=end_character_pos,
+                                 severity=self.__severity,
+                                 rule_id=self.__rule_id)
+
+        if not profile:
+            return self.__check(context, report, *args)
+
+        start = time.perf_counter()
+        try:
+            return self.__check(context, report, *args)
+        finally:
+            self.__elapsed += time.perf_counter()-start
+            self.__calls += 1
+
+
+class KACLRuleContext:
+    """Information about the validated document shared by all rules of a validation run.
+    Version and section rules running in worker processes only get the config.
+    """
+    def __init__(self, document=None, config=None):
+        self.document = document
+        self.config = config if config else document.config
+        self.version_strings = {v.version() for v in document.versions()} if document else set()
+
+
+class KACLRules:
+    """Registry of all validation rules. Rules run in registration order during a single
+    traversal of the document.
+    """
+    __rules = []
+
+    # versions are only split into chunks of at least this size for parallel validation
+    min_chunk_size = 50
+
+    @staticmethod
+    def register(rule_id, scope, severity=KACLRule.ERROR, description=""):
+        """Decorator registering a check function as validation rule. The arguments of the
+        check depend on the scope of the rule:
+
+            document: check(context, report)
+            version:  check(context, report, version, previous_version)
+            section:  check(context, report, version, title, section)
+            link:     check(context, report, version_string, link)
+
+        'report' takes the same arguments as KACLValidation.add_error. Document rules can
+        return False to stop the validation.
+        """
+        def decorator(check):
+            KACLRules.add(KACLRule(rule_id, scope, check, severity=severity, description=description))
+            return check
+        return decorator
+
+    @staticmethod
+    def add(rule):
+        KACLRules.remove(rule.rule_id())
+        KACLRules.__rules.append(rule)
+
+    @staticmethod
+    def remove(rule_id):
+        KACLRules.__rules[:] = [x for x in KACLRules.__rules if x.rule_id() != rule_id]
+
+    @staticmethod
+    def get(rule_id):
+        for rule in KACLRules.__rules:
+            if rule.rule_id() == rule_id:
+                return rule
+
+    @staticmethod
+    def rules(scope=None):
+        if scope is None:
+            return list(KACLRules.__rules)
+        return [x for x in KACLRules.__rules if x.scope() == scope]
+
+    @staticmethod
+    def reset_statistics():
+        for rule in KACLRules.__rules:
+            rule.reset_statistics()
+
+    @staticmethod
+    def validate(document, profile=False, jobs=1):
+        """Runs all registered rules on a document
+
+        Arguments:
+            document {[KACLDocument]} -- document to validate
+
+        Keyword Arguments:
+            profile {[bool]} -- collect timing statistics for every rule (default: {False})
+            jobs {[int]} -- number of processes running the version and section rules, 0 uses all cpus (default: {1})
+
+        Returns:
+            [KACLValidation] -- object holding all error information
+        """
+        validation = KACLValidation()
+        context = KACLRuleContext(document)
+
+        for rule in KACLRules.rules(KACLRule.DOCUMENT):
+            if rule.run(context, validation, profile=profile) is False:
+                return validation
+
+        version_rules = KACLRules.rules(KACLRule.VERSION)
+        section_rules = KACLRules.rules(KACLRule.SECTION)
+        versions = document.versions()
+        chunks = KACLRules.__split(versions, jobs)
+        if len(chunks) > 1 and KACLRules.__is_picklable(version_rules + section_rules):
+            import concurrent.futures
+
+            tasks = []
+            for begin, end in chunks:
+                previous_version = versions[begin-1] if begin > 0 else None
+                tasks.append((versions[begin:end], previous_version, document.config, version_rules, section_rules, profile))
+
+            with concurrent.futures.ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+                # results are returned in order of the chunks, which keeps the order of the errors
+                for errors, statistics in executor.map(KACLRules.validate_chunk, tasks):
+                    for error in errors:
+                        validation.errors().append(error)
+                    for rule, (calls, elapsed) in zip(version_rules + section_rules, statistics):
+                        rule.add_statistics(calls, elapsed)
+        else:
+            KACLRules.validate_versions(context, validation, versions, None, version_rules, section_rules, profile)
+
+        link_rules = KACLRules.rules(KACLRule.LINK)
+        for version_string, link in document.link_references().items():
+            for rule in link_rules:
+                rule.run(context, validation, version_string, link, profile=profile)
+
+        return validation
+
+    @staticmethod
+    def validate_versions(context, validation, versions, previous_version, version_rules, section_rules, profile=False):
+        """Runs version and section rules on consecutive versions
+
+        Arguments:
+            context {[KACLRuleContext]} -- context of the validation run
+            validation {[KACLValidation]} -- validation the findings are added to
+            versions {[list]} -- consecutive KACLVersions
+            previous_version {[KACLVersion]} -- version in front of the first one, None for the first version of a document
+            version_rules {[list]} -- rules with version scope
+            section_rules {[list]} -- rules with section scope
+        """
+        for version in versions:
+            for rule in version_rules:
+                rule.run(context, validation, version, previous_version, profile=profile)
+            if section_rules:
+                for title, section in version.sections().items():
+                    for rule in section_rules:
+                        rule.run(context, validation, version, title, section, profile=profile)
+            previous_version = version
+
+    @staticmethod
+    def validate_chunk(task):
+        """Entry point for worker processes validating a chunk of versions
+
+        Returns:
+            [tuple] -- list of KACLValidationErrors and (calls, elapsed) for every rule
+        """
+        versions, previous_version, config, version_rules, section_rules, profile = task
+        rules = version_rules + section_rules
+        for rule in rules:
+            rule.reset_statistics()
+
+        validation = KACLValidation()
+        KACLRules.validate_versions(KACLRuleContext(config=config), validation, versions, previous_version,
+                                    version_rules, section_rules, profile)
+        return validation.errors(), [(x.calls(), x.elapsed()) for x in rules]
+
+    @staticmethod
+    def __split(versions, jobs):
+        """splits the versions into (begin, end) ranges, one for every job"""
+        if jobs is None or jobs == 1:
+            return [(0, len(versions))]
+        if jobs < 1:
+            jobs = os.cpu_count() or 1
+
+        chunk_count = max(1, min(jobs, len(versions) // KACLRules.min_chunk_size))
+        chunk_size = -(-len(versions) // chunk_count)
+        return [(x, min(x+chunk_size, len(versions))) for x in range(0, len(versions), chunk_size)] or [(0, 0)]
+
+    @staticmethod
+    def __is_picklable(rules):
+        """rules with checks defined inside of functions cannot be sent to worker processes"""
+        import pickle
+
+        try:
+            pickle.dumps(rules)
+            return True
+        except (pickle.PicklingError, AttributeError, TypeError):
+            return False
+
+
+@KACLRules.register('1', KACLRule.DOCUMENT, description='exactly one top-level heading on the first line')
+def check_header(context, report):
+    headers = context.document.headers()
+    if len(headers) == 0:
+        report(line=None,
+               line_number=None,
+               error_message="No 'Changelog' header found.")
+
+        # we can stop here already
+        return False
+
+    header = context.document.header()
+    if header.raw() != header.raw().lstrip():
+        report(line=None,
+               line_number=None,
+               error_message="Changelog header not placed on first line.")
+
+    for header in headers[1:]:
+        report(line=header.raw(),
+               line_number=header.line_number(),
+               error_message="Unexpected additional top-level heading found.",
+               start_character_pos=0,
+               end_character_pos=len(header.raw()))
+
+
+@KACLRules.register('1.1', KACLRule.DOCUMENT, description='header title is in the list of allowed header titles')
+def check_header_title(context, report):
+    header = context.document.header()
+    if header.title() not in context.config.allowed_header_titles:
+        start_pos = header.raw().find(header.title())
+        end_pos = start_pos+len(header.title())
+        report(line=header.raw(),
+               line_number=header.line_number(),
+               error_message=f"Header title not valid. Options are [{','.join(context.config.allowed_header_titles)}]",
+               start_character_pos=start_pos,
+               end_character_pos=end_pos)
+
+
+@KACLRules.register('1.2', KACLRule.DOCUMENT, description='default content is part of the header section')
+def check_default_content(context, report):
+    header = context.document.header()
+    header_body = header.body().replace('\n', ' ')
+    for default_line in context.config.default_content:
+        if default_line not in header_body:
+            start_pos = header.raw().find(header.title())
+            end_pos = start_pos+len(header.title())
+            report(line=header.raw(),
+                   line_number=header.line_number(),
+                   error_message=f"Missing default content '{default_line}'",
+                   start_character_pos=start_pos,
+                   end_character_pos=end_pos)
+
+
+@KACLRules.register('3', KACLRule.VERSION, description='versions are valid semantic versions')
+def check_version_format(context, report, version, previous_version):
+    if "Unreleased" == version.version():
+        return
+
+    raw = version.raw()
+    regex = KACLPatterns.get(KACLPatterns.SEMVER)
+    regex_error = KACLPatterns.get(KACLPatterns.VERSION_TITLE, depth=2)
+    if version.link():
+        regex = KACLPatterns.get(KACLPatterns.LINKED_VERSION, depth=2)
+        regex_error = KACLPatterns.get(KACLPatterns.LINKED_VERSION_TITLE, depth=2)
+    if not KACLParser.parse_sem_ver(raw, regex):
+        start_pos = 0
+        end_pos = 0
+        m = regex_error.match(raw)
+        if m:
+            start_pos = raw.find(m.group(1))
+            end_pos = start_pos+len(m.group(1))
+        report(line=raw,
+               line_number=version.line_number(),
+               error_message="Version is not a valid semantic version.",
+               start_character_pos=start_pos,
+               end_character_pos=end_pos)
+
+
+@KACLRules.register('3.1', KACLRule.VERSION, description='versions are in descending order')
+def check_version_order(context, report, version, previous_version):
+    if previous_version is None:
+        return
+    try:
+        ordered = previous_version.semver().compare(version.semver()) > 0
+    except ValueError:
+        # 'Unreleased' and invalid versions are not compared, the latter are reported by rule 3
+        return
+
+    if not ordered:
+        report(line=version.raw(),
+               line_number=version.line_number(),
+               error_message="Versions are not in descending order.",
+               start_character_pos=0,
+               end_character_pos=len(version.raw()))
+
+
+@KACLRules.register('3.2', KACLRule.VERSION, description='released versions have a valid date')
+def check_version_date(context, report, version, previous_version):
+    if "Unreleased" == version.version():
+        return
+
+    if not version.date() or len(version.date()) < 1:
+        report(line=version.raw(),
+               line_number=version.line_number(),
+               error_message="Versions need to be decorated with a release date in the following format 'YYYY-MM-DD'",
+               start_character_pos=0,
+               end_character_pos=len(version.raw()))
+    if version.date() and not KACLPatterns.get(KACLPatterns.DATE_FORMAT).match(version.date()):
+        start_pos = version.raw().find(version.date())
+        end_pos = start_pos+len(version.date())
+        report(line=version.raw(),
+               line_number=version.line_number(),
+               error_message="Date does not match format 'YYYY-MM-DD'",
+               start_character_pos=start_pos,
+               end_character_pos=end_pos)
+
+
+@KACLRules.register('3.3', KACLRule.SECTION, description='only allowed sections are used')
+def check_section_title(context, report, version, title, section):
+    if title not in context.config.allowed_version_sections:
+        start_pos = section.raw().find(title)
+        end_pos = start_pos+len(title)
+        report(line=section.raw(),
+               line_number=section.line_number(),
+               error_message=f'"{title}" is not a valid section for a version. Options are [{",".join(context.config.allowed_version_sections)}]',
+               start_character_pos=start_pos,
+               end_character_pos=end_pos)
+
+
+@KACLRules.register('3.4', KACLRule.SECTION, description='sections only contain list elements')
+def check_section_content(context, report, version, title, section):
+    # bring everything into a single line
+    body = section.body()
+    body_clean = KACLPatterns.get(KACLPatterns.LINE_CONTINUATION).sub('', body)
+    lines = body_clean.split('\n\n')
+    non_list_lines = [x for x in lines if not x.strip().startswith('-') and len(x.strip()) > 0]
+    if len(non_list_lines) > 0:
+        report(line=body.strip(),
+               line_number=section.line_number(),
+               error_message='Section does contain more than only listings.')
+
+
+@KACLRules.register('3.5', KACLRule.VERSION, description='changes of a version are placed in sections')
+def check_version_content(context, report, version, previous_version):
+    if len(version.sections()) == 0 and len(version.body().strip()) != 0:
+        report(line=version.raw(),
+               line_number=version.line_number(),
+               error_message=f'Version "{version.version()}" has change elements outside of a change section.')
+
+
+@KACLRules.register('3.6', KACLRule.VERSION, description='linked versions have a link reference')
+def check_version_link(context, report, version, previous_version):
+    raw = version.raw()
+    if '[' in raw and ']' in raw and not version.has_link_reference():
+        report(line=raw,
+               line_number=version.line_number(),
+               error_message=f'Version "{version.version()}" is linked, but no link reference found in changelog file.',
+               start_character_pos=raw.find('['),
+               end_character_pos=raw.find(']'))
+
+
+@KACLRules.register('4.1', KACLRule.LINK, description='link references belong to a version')
+def check_link_reference(context, report, version_string, link):
+    if version_string not in context.version_strings:
+        report(line=link.raw(),
+               line_number=link.line_number(),
+               error_message="Link not referenced anywhere in the document",
+               start_character_pos=0,
+               end_character_pos=len(link.raw()))
@@ -2,6 +2,9 @@ from .document import KACLDocument
 from .element import KACLElement
 from .version import KACLVersion
 from .changes import KACLChanges
+from .patterns import KACLPatterns
+
+import io
 
 class KACLMarkdownSerializer:
     def __init__(self):
@@ -9,23 +12,45 @@ class KACLMarkdownSerializer:
 
     def serialize(self, document):
         if isinstance(document, KACLDocument):
-            data = [ self.__serialize_header(document.header()),
-                    document.header().body() ]
+            fp = io.StringIO()
+            self.serialize_to(document, fp)
+            return fp.getvalue()
+        elif isinstance(document, KACLVersion):
+            return self.__serialize_version(document)
 
-            link_references = []
-            for version in document.versions():
-                data.extend([ self.__serialize_version(version), '' ])
-                if version.has_link_reference():
-                    link_references.append(self.__serialize_link_reference(version))
+    def serialize_to(self, document, fp):
+        """Writes the markdown of a document or version to a file object. Documents are
+        written version by version, so only a single rendered version is held in memory.
 
-            data.extend(link_references)
+        Arguments:
+            document {[KACLDocument]} -- document or version to write
+            fp {[file]} -- text file object to write to
+        """
+        if isinstance(document, KACLVersion):
+            fp.write(self.__serialize_version(document))
+            return
 
-            if data[-1] != '':
-                data.append('')
+        # the blocks are separated by line breaks and the document ends with one
+        blocks = self.__serialize_blocks(document)
+        last = next(blocks)
+        fp.write(last)
+        for last in blocks:
+            fp.write('\n')
+            fp.write(last)
+        if last != '':
+            fp.write('\n')
 
-            return '\n'.join(data)
-        elif isinstance(document, KACLVersion):
-            return self.__serialize_version(document)
+    def __serialize_blocks(self, document):
+        yield self.__serialize_header(document.header())
+        yield document.header().body()
+
+        for version in document.versions():
+            yield self.__serialize_version(version)
+            yield ''
+
+        for version in document.versions():
+            if version.has_link_reference():
+                yield self.__serialize_link_reference(version)
 
     def __serialize_header(self, obj):
         if isinstance(obj, KACLChanges):
@@ -44,6 +69,15 @@ class KACLMarkdownSerializer:
             return f'# {obj.title()}'
 
     def __serialize_version(self, obj):
+        if not obj.is_modified():
+            # untouched versions are copied from the text they were parsed from, only the
+            # heading is rendered again if the version gained or lost its link
+            heading = obj.raw()
+            linked = KACLPatterns.get(KACLPatterns.LINKED_VERSION_TITLE, depth=2).match(heading) is not None
+            if linked != bool(obj.has_link_reference()):
+                heading = self.__serialize_header(obj)
+            return f'{heading}\n{obj.body()}'.rstrip()
+
         lines = [ self.__serialize_header(obj) ]
         for title, changes in obj.sections().items():
             lines.extend([
@@ -0,0 +1,173 @@
+import json
+import os
+import socketserver
+import threading
+
+import semver
+
+from .client import DEFAULT_SOCKET, KACLClient
+from .config import KACLConfig
+from .document import KACLDocument
+from .exception import KACLException
+from .serializer import KACLMarkdownSerializer
+
+
+class KACLServer:
+    """Keeps parsed changelogs in memory and answers requests on a Unix domain socket.
+
+    Every request is a JSON object on a single line with the 'command' and its arguments,
+    the 'file' of the changelog and optionally a 'config' file. The response is a JSON
+    object on a single line holding either the 'result' or an 'error' message. Changelogs
+    are parsed again when the modification time or size of the changelog or the config
+    file changes.
+
+        {"command": "current", "file": "/path/to/CHANGELOG.md"}
+        {"result": "1.0.0"}
+    """
+    def __init__(self, socket_path=DEFAULT_SOCKET):
+        self.__socket_path = socket_path
+        self.__documents = dict()
+        self.__lock = threading.Lock()
+        self.__server = None
+        self.__commands = {
+            'ping': self.__ping,
+            'current': self.__current,
+            'get': self.__get,
+            'verify': self.__verify,
+            'add': self.__add,
+            'release': self.__release,
+            'shutdown': self.__shutdown,
+        }
+
+    def serve_forever(self):
+        """Listens on the socket until a 'shutdown' request arrives. The socket file is
+        removed afterwards.
+        """
+        if os.path.exists(self.__socket_path):
+            if KACLClient(self.__socket_path).is_running():
+                raise KACLException(f"A kacl daemon is already listening on '{self.__socket_path}'.")
+            # left over by a daemon that did not shut down
+            os.remove(self.__socket_path)
+
+        self.__server = socketserver.ThreadingUnixStreamServer(self.__socket_path, KACLRequestHandler)
+        self.__server.daemon_threads = True
+        self.__server.kacl_server = self
+        try:
+            self.__server.serve_forever()
+        finally:
+            self.__server.server_close()
+            if os.path.exists(self.__socket_path):
+                os.remove(self.__socket_path)
+
+    def handle(self, request):
+        """Answers a single request
+
+        Arguments:
+            request {[dict]} -- command and its arguments
+
+        Returns:
+            [dict] -- response holding either 'result' or 'error'
+        """
+        command = self.__commands.get(request.get('command')) if isinstance(request, dict) else None
+        if command is None:
+            return {'error': f"Unknown command '{request.get('command') if isinstance(request, dict) else request}'."}
+
+        try:
+            with self.__lock:
+                return {'result': command(request)}
+        except KeyError as e:
+            return {'error': f'Missing argument {e}.'}
+        except (KACLException, ValueError, OSError) as e:
+            return {'error': str(e)}
+
+    def __document(self, request):
+        """returns the cached document of a changelog, parsed again if its files changed"""
+        file = request['file']
+        config_file = request.get('config')
+        stat = os.stat(file)
+        signature = (stat.st_mtime_ns, stat.st_size, os.stat(config_file).st_mtime_ns if config_file else None)
+
+        entry = self.__documents.get((file, config_file))
+        if entry is None or entry[0] != signature:
+            entry = (signature, self.__load(request))
+            self.__documents[(file, config_file)] = entry
+        return entry[1]
+
+    def __load(self, request):
+        """parses a changelog into a new document, which can be modified"""
+        config = KACLConfig(request['config']) if request.get('config') else KACLConfig()
+        config.changelog_file_path = request['file']
+        with open(request['file'], 'r') as f:
+            document = KACLDocument.parse(f.read())
+        document.config = config
+        return document
+
+    def __write(self, request, document):
+        """writes a modified document or returns its markdown"""
+        if not request.get('modify'):
+            return KACLMarkdownSerializer().serialize(document)
+
+        from . import save
+
+        save(document, request['file'])
+        self.__documents.pop((request['file'], request.get('config')), None)
+
+    def __ping(self, request):
+        return 'pong'
+
+    def __current(self, request):
+        return self.__document(request).current_version()
+
+    def __get(self, request):
+        version = self.__document(request).get(request['version'])
+        if version:
+            return KACLMarkdownSerializer().serialize(version)
+
+    def __verify(self, request):
+        return self.__document(request).validate().convert_to_dict()
+
+    def __add(self, request):
+        document = self.__load(request)
+        document.add(section=request['section'], data=request['message'])
+        return self.__write(request, document)
+
+    def __release(self, request):
+        document = self.__load(request)
+        if not document.is_valid():
+            raise KACLException("Changelog is not valid. Run 'kacl-cli verify' for more information.")
+
+        version = request['version']
+        increment = None
+        if version in ['major', 'minor', 'patch', 'post']:
+            increment = version
+            version = None
+        else:
+            try:
+                semver.VersionInfo.parse(version)
+            except ValueError:
+                raise KACLException(f'"{version}" not a valid semantic version.')
+
+        auto_link = request.get('auto_link', False)
+        if auto_link is False and document.config.link_auto_generate:
+            auto_link = True
+
+        document.release(version=version, link=request.get('link'), auto_link=auto_link, increment=increment)
+        return self.__write(request, document)
+
+    def __shutdown(self, request):
+        # shutdown waits for serve_forever to return, which happens in another thread
+        threading.Thread(target=self.__server.shutdown).start()
+
+
+class KACLRequestHandler(socketserver.StreamRequestHandler):
+    """Reads requests line by line from a connection and writes a response line for each"""
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {'error': f'Invalid request: {e}'}
+            else:
+                response = self.server.kacl_server.handle(request)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
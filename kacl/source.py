@@ -0,0 +1,86 @@
+import mmap
+import re
+
+
+class KACLMappedSource:
+    """Source text of a changelog backed by a memory mapped file. It provides the parts of
+    the str interface used by the tokenizer and parser. Offsets are byte offsets into the
+    file, slices are decoded on access and CRLF line endings are converted per slice.
+    """
+    def __init__(self, buffer, encoding='utf-8'):
+        self.__buffer = buffer
+        self.__encoding = encoding
+        self.__patterns = dict()
+
+    @staticmethod
+    def open(path, encoding='utf-8'):
+        """Maps a file into memory
+
+        Arguments:
+            path {[str]} -- path to the file
+
+        Keyword Arguments:
+            encoding {[str]} -- encoding of the file (default: {'utf-8'})
+
+        Returns:
+            [KACLMappedSource] -- source of the file, an empty str for empty files
+        """
+        with open(path, 'rb') as f:
+            if not len(f.read(1)):
+                # empty files cannot be mapped
+                return ""
+            return KACLMappedSource(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), encoding)
+
+    def __len__(self):
+        return len(self.__buffer)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            # the character starting at the offset, utf-8 characters take up to 4 bytes
+            return self.__buffer[key:key+4].decode(self.__encoding, 'ignore')[:1]
+
+        start, stop, _ = key.indices(len(self.__buffer))
+        data = self.__buffer[start:stop]
+        if b'\r' in data:
+            data = data.replace(b'\r\n', b'\n')
+            # the line break of a CR LF pair was cut off by the slice
+            if data.endswith(b'\r') and self.__buffer[stop:stop+1] == b'\n':
+                data = data[:-1]
+        return data.decode(self.__encoding)
+
+    def buffer(self):
+        """Returns the mapped bytes"""
+        return self.__buffer
+
+    def __str__(self):
+        return self[0:len(self.__buffer)]
+
+    def find(self, sub, start=0, end=None):
+        if end is None:
+            end = len(self.__buffer)
+        return self.__buffer.find(sub.encode(self.__encoding), start, end)
+
+    def match(self, regex, pos, endpos):
+        """Matches a str pattern at a byte offset, the offsets of the match are byte offsets
+
+        Arguments:
+            regex {[re.Pattern]} -- compiled str pattern
+            pos {[int]} -- offset to match at
+            endpos {[int]} -- offset the match has to end in front of
+
+        Returns:
+            [re.Match] -- match object, None if the pattern does not match
+        """
+        pattern = self.__patterns.get(regex)
+        if pattern is None:
+            pattern = re.compile(regex.pattern.encode(self.__encoding), regex.flags & ~re.UNICODE)
+            self.__patterns[regex] = pattern
+        return pattern.match(self.__buffer, pos, endpos)
+
+    def strip(self, start, end):
+        """Returns the offsets of the slice without leading and trailing whitespace"""
+        text = self.__buffer[start:end].decode(self.__encoding)
+        stripped = text.lstrip()
+        start += len(text[:len(text)-len(stripped)].encode(self.__encoding))
+        end -= len(stripped[len(stripped.rstrip()):].encode(self.__encoding))
+        return start, max(start, end)
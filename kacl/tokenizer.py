@@ -0,0 +1,92 @@
+from .patterns import KACLPatterns
+
+
+class KACLToken:
+    HEADING = 'heading'
+    LIST_ITEM = 'list_item'
+    LINK_REFERENCE = 'link_reference'
+
+    __slots__ = ('__kind', '__line_number', '__start', '__end', '__depth')
+
+    def __init__(self, kind, line_number, start, end, depth=0):
+        self.__kind = kind
+        self.__line_number = line_number
+        self.__start = start
+        self.__end = end
+        self.__depth = depth
+
+    def kind(self):
+        return self.__kind
+
+    def line_number(self):
+        return self.__line_number
+
+    def start(self):
+        """offset of the first character of the line within the tokenized text"""
+        return self.__start
+
+    def end(self):
+        """offset of the line break (or end of text) terminating the line"""
+        return self.__end
+
+    def depth(self):
+        return self.__depth
+
+
+class KACLTokenizer:
+    @staticmethod
+    def tokenize(text, pos=0, endpos=None, line_offset=0):
+        """Splits the text into lines in a single pass and emits a token for every
+        heading, list item and link reference line
+
+        Arguments:
+            text {[str]} -- markdown text to tokenize, or a KACLMappedSource
+
+        Keyword Arguments:
+            pos {[int]} -- offset to start tokenizing at (default: {0})
+            endpos {[int]} -- offset to stop tokenizing at (default: {len(text)})
+            line_offset {[int]} -- line number of the line preceding 'pos' (default: {0})
+
+        Returns:
+            [generator] -- KACLTokens in document order
+        """
+        if endpos is None:
+            endpos = len(text)
+
+        if isinstance(text, str):
+            buffer, newline, heading, list_item, link_reference = text, '\n', '#', '-', '['
+        else:
+            # mapped sources are tokenized on their bytes
+            buffer, newline, heading, list_item, link_reference = text.buffer(), b'\n', b'#', b'-', b'['
+
+        link_reference_regex = KACLPatterns.get(KACLPatterns.LINK_REFERENCE)
+        line_number = line_offset
+        start = pos
+        while True:
+            end = buffer.find(newline, start, endpos)
+            if end == -1:
+                end = endpos
+            line_number += 1
+
+            first = buffer[start:min(start+1, end)]
+            if first == heading:
+                line = buffer[start:end]
+                depth = len(line) - len(line.lstrip(heading))
+                if depth == len(line) or text[start+depth].isspace():
+                    yield KACLToken(KACLToken.HEADING, line_number, start, end, depth)
+            elif first == list_item:
+                yield KACLToken(KACLToken.LIST_ITEM, line_number, start, end)
+            elif first == link_reference:
+                if KACLTokenizer.match(link_reference_regex, text, start, end):
+                    yield KACLToken(KACLToken.LINK_REFERENCE, line_number, start, end)
+
+            if end >= endpos:
+                break
+            start = end + 1
+
+    @staticmethod
+    def match(regex, text, pos, endpos):
+        """Matches a compiled pattern against a str or a KACLMappedSource"""
+        if isinstance(text, str):
+            return regex.match(text, pos, endpos)
+        return text.match(regex, pos, endpos)
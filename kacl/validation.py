@@ -1,10 +1,12 @@
 class KACLValidationError():
-    def __init__(self, line="", line_number=0, start_character_pos=None, end_character_pos=None, error_message=""):
+    def __init__(self, line="", line_number=0, start_character_pos=None, end_character_pos=None, error_message="", severity="error", rule_id=None):
         self.__line_number = line_number
         self.__start_character_pos = start_character_pos
         self.__end_character_pos = end_character_pos
         self.__error_message = error_message
         self.__line = line
+        self.__severity = severity
+        self.__rule_id = rule_id
 
     def line_number(self):
         return self.__line_number
@@ -18,28 +20,49 @@ class KACLValidationError():
     def error_message(self):
         return self.__error_message
 
+    def severity(self):
+        return self.__severity
+
+    def rule_id(self):
+        return self.__rule_id
+
 
 class KACLValidation():
     def __init__(self):
         self.__validation_errors = []
 
     def is_valid(self):
-        return (len(self.__validation_errors) == 0)
+        return not any(x.severity() == 'error' for x in self.__validation_errors)
 
     def errors(self):
         return self.__validation_errors
 
-    def add_error(self, line, line_number, error_message, start_character_pos=None, end_character_pos=None):
+    def add_error(self, line, line_number, error_message, start_character_pos=None, end_character_pos=None, severity="error", rule_id=None):
         self.__validation_errors.append(KACLValidationError(line=line,
                                                             line_number=line_number,
                                                             start_character_pos=start_character_pos,
                                                             end_character_pos=end_character_pos,
-                                                            error_message=error_message))
+                                                            error_message=error_message,
+                                                            severity=severity,
+                                                            rule_id=rule_id))
+
 
+    @staticmethod
+    def from_dict(validation_map):
+        validation = KACLValidation()
+        for error in validation_map['errors']:
+            validation.add_error(line=error['line'],
+                                 line_number=error['line_number'],
+                                 error_message=error['error_message'],
+                                 start_character_pos=error['start_char_pos'],
+                                 end_character_pos=error['end_character_pos'],
+                                 severity=error.get('severity', 'error'),
+                                 rule_id=error.get('rule'))
+        return validation
 
     def convert_to_dict(self):
         validation_map = dict()
-        validation_map['valid'] = (len(self.__validation_errors) == 0)
+        validation_map['valid'] = self.is_valid()
         errors = []
         for error in self.__validation_errors:
             error_map = {
@@ -47,7 +70,9 @@ class KACLValidation():
                 "line_number": error.line_number(),
                 "start_char_pos": error.position()[0],
                 "end_character_pos": error.position()[1],
-                "error_message": error.error_message()
+                "error_message": error.error_message(),
+                "severity": error.severity(),
+                "rule": error.rule_id()
             }
             errors.append(error_map)
         validation_map['errors'] = errors
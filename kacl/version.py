@@ -1,25 +1,32 @@
 from .element import KACLElement
 from .changes import KACLChanges
 from .parser import KACLParser
+from .patterns import KACLPatterns
 
-import re
 import semver
+import sys
 
 
 class KACLVersion(KACLElement):
+    __slots__ = ('__date', '__version', '__semver', '__sections', '__link_reference', '__document', '__dirty')
+
     def __init__(self, element=KACLElement(), version="", date="", sections=None, link=None):
         KACLElement.__init__(self,
-                             raw=element.raw(),
-                             title=element.title(),
-                             body=element.body(),
+                             source=element.source(),
+                             spans=element.spans(),
                              line_number=element.line_number())
         self.__date = date
         self.__version = version
+        self.__semver = None
         if sections is None:
             self.__sections = dict()
         else:
             self.__sections = sections
         self.__link_reference = None
+        self.__document = None
+        # versions without a heading in the source are always rendered
+        (raw_start, raw_end), _, _ = self.spans()
+        self.__dirty = raw_start is None or raw_start == raw_end
         self.set_link(link)
 
     def link(self):
@@ -29,8 +36,35 @@ class KACLVersion(KACLElement):
     def set_link(self, link):
         if isinstance(link, KACLElement):
             self.__link_reference = link
+            self.__modified()
         elif link != None:
             self.__link_reference = KACLElement(title=self.version(), body=link)
+            self.__modified()
+
+    def set_document(self, document):
+        """Sets the document this version belongs to. The document will be notified about
+        all modifications of the version.
+        """
+        self.__document = document
+
+    def __getstate__(self):
+        # versions sent to other processes do not take their document along
+        state = KACLElement.__getstate__(self)
+        state['_KACLVersion__document'] = None
+        return state
+
+    def is_modified(self):
+        """Checks if the version was changed after it was parsed. Unchanged versions
+        are serialized from their source text.
+
+        Returns:
+            [bool] -- true if the version or one of its sections was changed
+        """
+        return self.__dirty or any(x.is_modified() for x in self.__sections.values())
+
+    def __modified(self, versions=False):
+        if self.__document is not None:
+            self.__document.mark_modified(versions=versions)
 
     def has_link_reference(self):
         if not self.__link_reference:
@@ -41,7 +75,7 @@ class KACLVersion(KACLElement):
     def date(self):
         if not len(self.__date):
             title = self.title()
-            m = re.search(r'\d\d\d\d-\d\d-\d\d', title)
+            m = KACLPatterns.get(KACLPatterns.DATE).search(title)
             if m:
                 self.__date = m.group().strip()
 
@@ -49,33 +83,75 @@ class KACLVersion(KACLElement):
 
     def version(self):
         if not len(self.__version):
-            title = self.title()
-            version = KACLParser.parse_sem_ver(title)
-            if version:
-                self.__version = version
-            elif 'unreleased' in title.lower():
-                self.__version = "Unreleased"
+            self.__version = KACLParser.parse_version(self.title())
 
         return self.__version
 
     def semver(self):
-        return semver.VersionInfo.parse(self.version())
+        """Returns the parsed semantic version, which is cached until the version changes.
+        Raises a ValueError if the version is not a valid semantic version.
+        """
+        if self.__semver is None:
+            self.__semver = semver.VersionInfo.parse(self.version())
+        return self.__semver
+
+    @staticmethod
+    def normalize(version):
+        """Returns the form of a version string used for lookups"""
+        version = version.strip()
+        if version.lower() == 'unreleased':
+            return 'Unreleased'
+        return version
 
     def set_version(self, version):
         self.__version = version
+        self.__semver = None
+        self.__dirty = True
+        self.__modified(versions=True)
 
     def sections(self):
         if not len(self.__sections) and len(self.body().strip()):
             self.__sections = dict()
-            sections = KACLParser.parse_header(text=self.body(),
+            # sections reference the source of the version instead of a copy of its body
+            _, _, (body_start, body_end) = self.spans()
+            sections = KACLParser.parse_header(text=self.source(),
                                                start_depth=3,
                                                end_depth=3,
-                                               line_offset=self.line_number())
+                                               line_offset=self.line_number(),
+                                               pos=body_start,
+                                               endpos=body_end)
             for section in sections:
                 sec = KACLChanges(section)
-                self.__sections[sec.title()] = sec
+                # section titles repeat in every version
+                self.__sections[sys.intern(sec.title())] = sec
         return self.__sections
 
+    def convert_to_dict(self, source=None):
+        version_map = KACLElement.convert_to_dict(self, source)
+        version_map['version'] = self.__version
+        version_map['date'] = self.__date
+        version_map['link'] = self.__link_reference.convert_to_dict(source) if self.__link_reference else None
+        return version_map
+
+    @staticmethod
+    def from_dict(version_map, source=None):
+        link = None
+        if version_map.get('link'):
+            link = KACLElement.from_dict(version_map['link'], source)
+        return KACLVersion(element=KACLElement.from_dict(version_map, source),
+                           version=version_map['version'],
+                           date=version_map['date'],
+                           link=link)
+
+    def set_line_number(self, line_number):
+        # keep already parsed sections in sync with the version heading
+        if self.line_number() is not None and line_number is not None:
+            delta = line_number - self.line_number()
+            for section in self.__sections.values():
+                if section.line_number() is not None:
+                    section.set_line_number(section.line_number()+delta)
+        KACLElement.set_line_number(self, line_number)
+
     def changes(self, section):
         sections = self.sections()
         if sections and section in sections:
@@ -88,3 +164,5 @@ class KACLVersion(KACLElement):
             self.__sections[section] = KACLChanges(KACLElement(
                 title=section, body="", line_number=None))
         self.__sections[section].add(change)
+        self.__dirty = True
+        self.__modified()
@@ -23,12 +23,12 @@ setup(name='python-kacl',
       author='Matthias Schmieder',
       author_email='schmieder.matthias@gmail.com',
       entry_points={
-           "console_scripts": ['kacl-cli = kacl.kacl_cli:start']
+           "console_scripts": ['kacl-cli = kacl.kacl_cli:start', 'kacl-lsp = kacl.lsp:main']
       },
       license='MIT',
-      packages=find_packages(),
+      packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
       include_package_data=True,
-      python_requires='>=3.6',
+      python_requires='>=3.7',
       install_requires=[
         'click',
         'semver',
@@ -39,7 +39,7 @@ setup(name='python-kacl',
       classifiers= [
           "License :: OSI Approved :: MIT License",
           "Programming Language :: Python :: 3",
-          "Programming Language :: Python :: 3.6",
+          "Programming Language :: Python :: 3.7",
           "Intended Audience :: Developers",
           "Topic :: Software Development :: Version Control"
       ])
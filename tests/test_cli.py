@@ -1,11 +1,13 @@
 from click.testing import CliRunner
-from kacl.kacl_cli import cli
+from kacl.kacl_cli import cli, exit_status
 from tests.snapshot_directory import snapshot_directory
 from freezegun import freeze_time
 
 import json
 import os
 import shutil
+import threading
+import time
 
 def test_verify():
     runner = CliRunner()
@@ -14,16 +16,144 @@ def test_verify():
     assert result.output == 'Success\n'
 
     result = runner.invoke(cli, ['-f', 'tests/data/CHANGELOG_invalid.md' , 'verify'])
-    assert result.exit_code == 10 # spawns 8 errors
+    assert result.exit_code == 11 # spawns 11 errors
 
 def test_verify_with_json_output():
     runner = CliRunner()
     result = runner.invoke(cli, ['-f', 'tests/data/CHANGELOG_invalid.md', 'verify', '--json'])
     validation_result = json.loads(result.output)
 
-    assert len(validation_result["errors"]) == 10
+    assert len(validation_result["errors"]) == 11
     assert validation_result["valid"] == False
 
+def test_verify_with_rule_profile():
+    runner = CliRunner()
+    result = runner.invoke(cli, ['-f', 'tests/data/CHANGELOG_invalid.md', 'verify', '--profile-rules'])
+    assert result.exit_code == 11
+    assert 'sections only contain list elements' in result.output
+
+def test_verify_with_jobs():
+    runner = CliRunner()
+    serial = runner.invoke(cli, ['-f', 'tests/data/CHANGELOG_invalid.md', 'verify', '--json'])
+    parallel = runner.invoke(cli, ['-f', 'tests/data/CHANGELOG_invalid.md', 'verify', '--json', '--jobs', '2'])
+    assert parallel.exit_code == serial.exit_code == 11
+    assert parallel.output == serial.output
+
+def test_verify_glob(tmp_path):
+    runner = CliRunner()
+    resources_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data/")
+    for package, changelog in [('a', 'CHANGELOG.md'), ('b', 'CHANGELOG_invalid.md')]:
+        os.makedirs(os.path.join(tmp_path, package))
+        shutil.copyfile(os.path.join(resources_dir, changelog), os.path.join(tmp_path, package, 'CHANGELOG.md'))
+
+    result = runner.invoke(cli, ['verify', '--json', '--glob', os.path.join(str(tmp_path), '*', 'CHANGELOG.md')])
+    assert result.exit_code == 11
+    report = json.loads(result.output)
+    assert report[os.path.join(str(tmp_path), 'a', 'CHANGELOG.md')]['valid']
+    assert len(report[os.path.join(str(tmp_path), 'b', 'CHANGELOG.md')]['errors']) == 11
+
+    # exit statuses are truncated to 8 bits by the OS
+    assert exit_status(11) == 11
+    assert exit_status(256) == 255
+
+def test_current_and_get(tmp_path):
+    runner = CliRunner()
+    changelog_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data/CHANGELOG.md")
+    with open(changelog_file, 'r') as f:
+        data = f.read()
+    crlf_changelog_file = os.path.join(str(tmp_path), 'CHANGELOG.md')
+    with open(crlf_changelog_file, 'w', newline='\r\n') as f:
+        f.write(data)
+
+    for changelog in [changelog_file, crlf_changelog_file]:
+        result = runner.invoke(cli, ['-f', changelog, 'current'])
+        assert result.output == '1.0.0\n'
+
+        result = runner.invoke(cli, ['-f', changelog, 'get', '0.3.0'])
+        assert result.exit_code == 0
+        assert result.output.startswith('## [0.3.0] - 2015-12-03\n### Added\n')
+
+    result = runner.invoke(cli, ['-f', changelog_file, 'get', '9.9.9'])
+    assert result.exit_code == 1
+
+def test_serve(tmp_path):
+    from kacl.client import KACLClient
+    from kacl.server import KACLServer
+
+    runner = CliRunner()
+    resources_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data/")
+
+    with runner.isolated_filesystem(temp_dir=tmp_path) as project_root_path:
+        changelog_file = os.path.join(project_root_path, 'CHANGELOG.md')
+        shutil.copyfile(os.path.join(resources_dir, 'CHANGELOG_with_changes.md'), changelog_file)
+        socket_path = os.path.join(project_root_path, 'kacl.sock')
+
+        commands = [['current'], ['get', '1.0.0'], ['get', '9.9.9'], ['verify', '--json'],
+                    ['add', 'Added', 'new change'], ['release', 'patch'], ['release', 'foo']]
+        local = [runner.invoke(cli, ['-f', 'CHANGELOG.md'] + x) for x in commands]
+
+        server = threading.Thread(target=KACLServer(socket_path).serve_forever)
+        server.start()
+        client = KACLClient(socket_path)
+        try:
+            while not client.is_running():
+                time.sleep(0.01)
+
+            forwarded = [runner.invoke(cli, ['--socket', socket_path, '-f', 'CHANGELOG.md'] + x) for x in commands]
+            assert [(x.exit_code, x.output) for x in forwarded] == [(x.exit_code, x.output) for x in local]
+
+            # the daemon notices modifications of the changelog
+            result = runner.invoke(cli, ['--socket', socket_path, '-f', 'CHANGELOG.md', 'add', 'Fixed', 'a fix', '-m'])
+            assert result.exit_code == 0
+            assert client.request('get', file=changelog_file, version='unreleased').endswith('### Fixed\n- a fix')
+        finally:
+            client.request('shutdown')
+            server.join()
+        assert not os.path.exists(socket_path)
+
+def test_default_socket_is_not_used(tmp_path):
+    import socket
+
+    runner = CliRunner()
+    resources_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data/")
+
+    with runner.isolated_filesystem(temp_dir=tmp_path) as project_root_path:
+        shutil.copyfile(os.path.join(resources_dir, 'CHANGELOG.md'), os.path.join(project_root_path, 'CHANGELOG.md'))
+
+        # somebody else's daemon listening on the default socket in the working directory
+        requests = []
+        stopped = threading.Event()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind('.kacl.sock')
+        listener.listen()
+        listener.settimeout(0.01)
+
+        def answer():
+            while not stopped.is_set():
+                try:
+                    connection, _ = listener.accept()
+                except socket.timeout:
+                    continue
+                with connection:
+                    requests.append(connection.makefile('rb').readline())
+                    connection.sendall(b'{"error": "forwarded"}\n')
+
+        daemon = threading.Thread(target=answer)
+        daemon.start()
+        try:
+            result = runner.invoke(cli, ['verify'], env={'KACL_SOCKET': None})
+            forwarded = runner.invoke(cli, ['--socket', '.kacl.sock', 'verify'])
+        finally:
+            stopped.set()
+            daemon.join()
+            listener.close()
+
+        assert result.exit_code == 0
+        assert 'Success' in result.output
+        # only the call naming the socket explicitly reached the daemon
+        assert len(requests) == 1
+        assert forwarded.exit_code != 0
+
 @freeze_time("2023-01-01")
 def test_release_patch(tmp_path, snapshot):
     runner = CliRunner()
@@ -146,3 +276,20 @@ def test_config(tmp_path, snapshot):
     )
     assert result.exit_code != 0, result.output
 
+
+def test_verify_with_cache(tmp_path):
+    runner = CliRunner()
+    resources_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data/")
+
+    with runner.isolated_filesystem(temp_dir=tmp_path) as project_root_path:
+        shutil.copyfile(os.path.join(resources_dir, 'CHANGELOG_invalid.md'), os.path.join(project_root_path, 'CHANGELOG.md'))
+
+        first = runner.invoke(cli, ['--cache', '-f', 'CHANGELOG.md', 'verify', '--json'])
+        assert len(os.listdir(os.path.join(project_root_path, '.kacl-cache'))) == 1
+
+        second = runner.invoke(cli, ['--cache', '-f', 'CHANGELOG.md', 'verify', '--json'])
+        assert second.exit_code == first.exit_code
+        assert json.loads(second.output) == json.loads(first.output)
+
+        result = runner.invoke(cli, ['--cache', '-f', 'CHANGELOG.md', 'current'])
+        assert result.output == '1.0.0\n'
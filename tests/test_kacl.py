@@ -2,7 +2,14 @@ from unittest import TestCase
 
 import kacl
 from kacl.config import KACLConfig
+from kacl.parser import KACLParser
+from kacl.patterns import KACLPatterns
+from kacl.rules import KACLRule, KACLRules
+from kacl.tokenizer import KACLToken, KACLTokenizer
+import json
 import os
+import tempfile
+import time
 import yaml
 
 
@@ -42,6 +49,77 @@ class TestKacl(TestCase):
                          len(changelog_reference_lines))
         self.assertEqual(changelog_dump, changelog_reference)
 
+    def test_dump_to_file(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+        changelog = kacl.load(changelog_file)
+
+        with tempfile.TemporaryFile('w+') as f:
+            self.assertIsNone(kacl.dump(changelog, f))
+            f.seek(0)
+            self.assertEqual(f.read(), kacl.dump(changelog))
+
+        with tempfile.TemporaryFile('w+') as f:
+            kacl.dump(kacl.new(), f)
+            f.seek(0)
+            self.assertEqual(f.read(), kacl.dump(kacl.new()))
+
+    def test_save(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'CHANGELOG.md')
+            changelog = kacl.load(changelog_file)
+            self.assertTrue(kacl.save(changelog, path))
+            umask = os.umask(0)
+            os.umask(umask)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~umask)
+            os.chmod(path, 0o640)
+
+            # unchanged content does not rewrite the file
+            self.assertFalse(kacl.save(kacl.load(path), path))
+
+            changelog.add('Added', 'saved atomically')
+            self.assertTrue(kacl.save(changelog, path))
+            with open(path, 'r') as f:
+                self.assertEqual(f.read(), kacl.dump(changelog))
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+            self.assertEqual(os.listdir(directory), ['CHANGELOG.md'])
+
+    def test_dump_untouched_versions(self):
+        changelog = kacl.parse("""# Changelog
+Intro
+
+## [Unreleased]
+### Added
+- new feature
+
+## [1.0.0] - 2017-06-20
+Some notes that are not part of a section.
+
+### Fixed
+* bullet with another marker
+- item with trailing spaces   
+
+[Unreleased]: https://example.com/compare/1.0.0...HEAD
+[1.0.0]: https://example.com/1.0.0
+""")
+        changelog.add('Added', 'another feature')
+        self.assertTrue(changelog.get('Unreleased').is_modified())
+        self.assertFalse(changelog.get('1.0.0').is_modified())
+
+        changelog_dump = kacl.dump(changelog)
+        self.assertIn('- new feature\n- another feature\n', changelog_dump)
+        self.assertIn("""## [1.0.0] - 2017-06-20
+Some notes that are not part of a section.
+
+### Fixed
+* bullet with another marker
+- item with trailing spaces
+
+[Unreleased]""", changelog_dump)
+
     def test_add_change(self):
         changelog_file = os.path.join(os.path.dirname(
             os.path.realpath(__file__)), "data/CHANGELOG.md")
@@ -296,6 +374,30 @@ class TestKacl(TestCase):
         self.assertNotEqual(kacl_config.git_create_commit, default_config['git']['commit'] )
         self.assertEqual(kacl_config.git_create_commit, True )
 
+    def test_config_is_loaded_once(self):
+        # instances do not share the loaded lists
+        kacl_config = KACLConfig()
+        kacl_config.allowed_version_sections.append('Hacked')
+        self.assertNotIn('Hacked', KACLConfig().allowed_version_sections)
+
+        # user configs are read again when they change
+        with tempfile.TemporaryDirectory() as directory:
+            config_file = os.path.join(directory, '.kacl.yml')
+            with open(config_file, 'w') as f:
+                f.write('kacl:\n  allowed_version_sections:\n    - Security\n')
+            self.assertEqual(KACLConfig(config_file).allowed_version_sections, ['Security'])
+
+            with open(config_file, 'w') as f:
+                f.write('kacl:\n  allowed_version_sections:\n    - Fixed\n')
+            os.utime(config_file, ns=(0, 0))
+            self.assertEqual(KACLConfig(config_file).allowed_version_sections, ['Fixed'])
+
+            # same modification time, but a different size
+            with open(config_file, 'w') as f:
+                f.write('kacl:\n  allowed_version_sections:\n    - Added\n    - Removed\n')
+            os.utime(config_file, ns=(0, 0))
+            self.assertEqual(KACLConfig(config_file).allowed_version_sections, ['Added', 'Removed'])
+
 
     def test_link_generation(self):
         valid_files = [
@@ -314,3 +416,521 @@ class TestKacl(TestCase):
             versions = changelog.versions()
             for v in versions:
                 self.assertIsNotNone(v.link())
+
+    def test_validation_is_memoized(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+        changelog = kacl.load(changelog_file)
+
+        validation = changelog.validate()
+        self.assertTrue(changelog.is_valid())
+        self.assertIs(changelog.validate(), validation)
+
+        changelog.get('1.0.0').set_link(None)
+        self.assertIs(changelog.validate(), validation)
+
+        changelog.add('Hacked', 'This is not a valid section')
+        self.assertIsNot(changelog.validate(), validation)
+        self.assertFalse(changelog.is_valid())
+
+        validation = changelog.validate()
+        changelog.get('1.0.0').set_link('https://my-host/1.0.0')
+        self.assertIsNot(changelog.validate(), validation)
+
+    def test_parallel_validation(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG_invalid.md")
+        serial = kacl.load(changelog_file).validate()
+
+        min_chunk_size = KACLRules.min_chunk_size
+        KACLRules.min_chunk_size = 1
+        try:
+            parallel = kacl.load(changelog_file).validate(jobs=3)
+        finally:
+            KACLRules.min_chunk_size = min_chunk_size
+
+        self.assertEqual(serial.convert_to_dict(), parallel.convert_to_dict())
+
+    def test_verify_many(self):
+        data_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+        files = [os.path.join(data_dir, "CHANGELOG.md"), os.path.join(data_dir, "CHANGELOG_invalid.md")]
+
+        validations = kacl.verify_many(files, jobs=2)
+        self.assertEqual(list(validations.keys()), files)
+        self.assertTrue(validations[files[0]].is_valid())
+        self.assertEqual(len(validations[files[1]].errors()), 11)
+
+    def test_custom_rule(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+        changelog = kacl.load(changelog_file)
+
+        def check_item_length(context, report, version, title, section):
+            for item in section.items():
+                if len(item) > 100:
+                    report(line=section.raw(), line_number=section.line_number(), error_message='Item too long')
+
+        KACLRules.add(KACLRule('custom', KACLRule.SECTION, check_item_length, severity=KACLRule.WARNING))
+        try:
+            validation = changelog.validate(profile=True)
+        finally:
+            KACLRules.remove('custom')
+
+        warnings = [x for x in validation.errors() if x.rule_id() == 'custom']
+        self.assertGreater(len(warnings), 0)
+        self.assertEqual(warnings[0].severity(), KACLRule.WARNING)
+        self.assertTrue(validation.is_valid())
+        self.assertGreater(KACLRules.get('3.4').calls(), 0)
+        self.assertIsNone(KACLRules.get('custom'))
+
+    def test_cache_key_depends_on_rules(self):
+        from kacl.cache import KACLCache
+
+        cache = KACLCache()
+        config = KACLConfig()
+        key = cache.key("# Changelog\n", config)
+
+        KACLRules.add(KACLRule('custom', KACLRule.VERSION, lambda context, report, version, previous_version: None))
+        try:
+            self.assertNotEqual(cache.key("# Changelog\n", config), key)
+        finally:
+            KACLRules.remove('custom')
+        self.assertEqual(cache.key("# Changelog\n", config), key)
+
+    def test_convert_to_dict(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+        changelog = kacl.load(changelog_file)
+
+        restored = kacl.KACLDocument.from_dict(json.loads(json.dumps(changelog.convert_to_dict())))
+        self.assertEqual(kacl.dump(restored), kacl.dump(changelog))
+        self.assertEqual(restored.get('1.0.0').line_number(), changelog.get('1.0.0').line_number())
+        self.assertEqual(restored.get('1.0.0').link(), changelog.get('1.0.0').link())
+
+        with open(changelog_file, 'r') as f:
+            data = f.read()
+        restored = kacl.KACLDocument.from_dict(json.loads(json.dumps(changelog.convert_to_dict(offsets=True))), data=data)
+        self.assertEqual(kacl.dump(restored), kacl.dump(changelog))
+
+    def test_version_lookup(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+        changelog = kacl.load(changelog_file)
+
+        self.assertIs(changelog.get('unreleased'), changelog.versions()[0])
+        self.assertEqual(changelog.get('0.3.0').version(), '0.3.0')
+        self.assertIsNone(changelog.get('9.9.9'))
+        self.assertEqual([x.version() if x else None for x in changelog.get_many(['1.0.0', '9.9.9', '0.0.1'])],
+                         ['1.0.0', None, '0.0.1'])
+        self.assertEqual([x.version() for x in changelog.versions_between('0.0.7', '0.2.0')],
+                         ['0.2.0', '0.1.0', '0.0.8', '0.0.7'])
+
+        # the index follows modifications
+        changelog.get('0.3.0').set_version('0.3.1')
+        self.assertIsNone(changelog.get('0.3.0'))
+        self.assertEqual(changelog.get('0.3.1').version(), '0.3.1')
+        self.assertEqual([x.version() for x in changelog.versions_between('0.3.0', '1.0.0')], ['1.0.0', '0.3.1'])
+
+        changelog.add('Added', 'new feature')
+        changelog.release(version='1.1.0')
+        self.assertEqual(changelog.get('1.1.0').date(), changelog.versions()[1].date())
+        self.assertEqual([x.version() for x in changelog.versions_between('1.0.0', '2.0.0')], ['1.1.0', '1.0.0'])
+
+        # the returned list is a copy, changing it does not affect the document or its index
+        changelog.versions().clear()
+        self.assertEqual(changelog.get('1.1.0').version(), '1.1.0')
+        self.assertEqual(len(changelog.versions()), len(kacl.parse(kacl.dump(changelog)).versions()))
+
+    def test_version_order(self):
+        changelog = kacl.parse("# Changelog\n## [Unreleased]\n## [1.0.0] - 2020-01-01\n## [1.1.0] - 2019-01-01\n")
+
+        version = changelog.get('1.1.0')
+        self.assertIs(version.semver(), version.semver())
+        errors = [x for x in changelog.validate().errors() if x.rule_id() == '3.1']
+        self.assertEqual([x.line_number() for x in errors], [4])
+
+        version.set_version('0.9.0')
+        self.assertEqual(str(version.semver()), '0.9.0')
+        self.assertFalse([x for x in changelog.validate().errors() if x.rule_id() == '3.1'])
+
+    def test_load_mmap(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG_invalid.md")
+        with open(changelog_file, 'r') as f:
+            data = f.read()
+
+        with tempfile.TemporaryDirectory() as directory:
+            crlf_changelog_file = os.path.join(directory, 'CHANGELOG.md')
+            with open(crlf_changelog_file, 'w', newline='\r\n', encoding='utf-8') as f:
+                f.write(data.replace('- ', '- ä '))
+
+            for path in [changelog_file, crlf_changelog_file]:
+                changelog = kacl.load(path)
+                mapped = kacl.load(path, mmap=True)
+                self.assertIsInstance(mapped.header().source(), kacl.KACLMappedSource)
+                self.assertEqual([(x.raw(), x.body(), x.line_number(), x.link()) for x in mapped.versions()],
+                                 [(x.raw(), x.body(), x.line_number(), x.link()) for x in changelog.versions()])
+                self.assertEqual(mapped.get('1.0.0').changes('Added').items(),
+                                 changelog.get('1.0.0').changes('Added').items())
+                self.assertEqual([x.line_number() for x in mapped.validate(jobs=2).errors()],
+                                 [x.line_number() for x in changelog.validate().errors()])
+                self.assertEqual(kacl.dump(mapped), kacl.dump(changelog))
+                del mapped
+
+    def test_iter_versions(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+        changelog = kacl.load(changelog_file)
+
+        versions = list(kacl.iter_versions(changelog_file))
+        self.assertEqual([(x.raw(), x.body(), x.line_number()) for x in versions],
+                         [(x.raw(), x.body(), x.line_number()) for x in changelog.versions()])
+
+        with open(changelog_file, 'r') as f:
+            reader = kacl.KACLReader(f)
+            # the link is looked up while the reader is in the middle of the file
+            next(x for x in reader.versions() if x.version() == '0.3.0')
+            link = reader.link_reference('0.3.0')
+        self.assertEqual(link.body(), changelog.get('0.3.0').link())
+        self.assertEqual(link.line_number(), changelog.link_references()['0.3.0'].line_number())
+
+    def test_reader_find(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+        changelog = kacl.load(changelog_file)
+
+        with open(changelog_file, 'r') as f:
+            self.assertEqual(kacl.KACLReader(f).current_version(), '1.0.0')
+
+        for version in ['unreleased', '1.0.0', '0.3.0', '0.0.1', '9.9.9']:
+            with open(changelog_file, 'r') as f:
+                reader = kacl.KACLReader(f)
+                # read the link references in several chunks
+                reader.chunk_size = 64
+                found = reader.find(version)
+            expected = changelog.get(version)
+            if expected is None:
+                self.assertIsNone(found)
+                continue
+            self.assertEqual((found.raw(), found.body(), found.line_number(), found.link()),
+                             (expected.raw(), expected.body(), expected.line_number(), expected.link()))
+
+    def test_elements_share_source(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+        changelog = kacl.load(changelog_file)
+
+        version = changelog.get('1.0.0')
+        section = version.changes('Added')
+        self.assertIs(version.source(), changelog.header().source())
+        self.assertIs(section.source(), version.source())
+        self.assertIn(section.body(), version.body())
+        self.assertFalse(hasattr(section, '__dict__'))
+
+    def test_tokenizer(self):
+        text = "# Changelog\n## [1.0.0] - 2020-01-01\n### Added\n- first\n  continued\n- second\n\n[1.0.0]: https://my-host/1.0.0"
+        tokens = list(KACLTokenizer.tokenize(text))
+
+        self.assertEqual([t.kind() for t in tokens], [KACLToken.HEADING, KACLToken.HEADING, KACLToken.HEADING,
+                                                      KACLToken.LIST_ITEM, KACLToken.LIST_ITEM, KACLToken.LINK_REFERENCE])
+        self.assertEqual([t.depth() for t in tokens[:3]], [1, 2, 3])
+        self.assertEqual([t.line_number() for t in tokens], [1, 2, 3, 4, 6, 8])
+        self.assertEqual(text[tokens[1].start():tokens[1].end()], "## [1.0.0] - 2020-01-01")
+
+    def test_patterns(self):
+        pattern = KACLPatterns.get(KACLPatterns.LINKED_VERSION, depth=2)
+        self.assertIs(pattern, KACLPatterns.get(KACLPatterns.LINKED_VERSION, depth=2))
+        self.assertIsNotNone(pattern.search('## [1.0.0] - 2020-01-01'))
+        self.assertIsNone(pattern.search('## 1.0.0 - 2020-01-01'))
+
+    def test_adjacent_headings(self):
+        changelog = kacl.parse("# Changelog\n## [1.0.0] - 2020-01-01\n## [0.9.0] - 2019-01-01\n### Added\n### Fixed\n- fix\n")
+
+        self.assertEqual([v.version() for v in changelog.versions()], ['1.0.0', '0.9.0'])
+        version = changelog.get('0.9.0')
+        self.assertEqual(list(version.sections().keys()), ['Added', 'Fixed'])
+        self.assertEqual(version.changes('Fixed').line_number(), 5)
+        self.assertEqual(version.changes('Fixed').items(), ['fix'])
+
+    def test_apply_edit(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+        changelog = kacl.load(changelog_file)
+        versions = list(changelog.versions())
+
+        # add a new section to the 'Unreleased' version right below its heading
+        unreleased_line = changelog.get('Unreleased').line_number()
+        changelog.apply_edit(unreleased_line+1, unreleased_line, "### Added\n- my new change\n")
+
+        self.assertIn('my new change', changelog.get('Unreleased').changes('Added').items())
+        self.assertIs(changelog.get('1.0.0'), versions[1])
+        self.assertEqual(changelog.get('1.0.0').line_number(), versions[1].line_number())
+
+        reference = kacl.parse(kacl.dump(changelog))
+        for version, expected in zip(changelog.versions(), reference.versions()):
+            self.assertEqual(version.version(), expected.version())
+            self.assertEqual(version.line_number(), expected.line_number())
+            self.assertEqual(version.body(), expected.body())
+
+    def test_apply_edit_after_modification(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+
+        # an edit inside a version is re-parsed incrementally, an edit of the link
+        # references parses the whole document again
+        for edit in ['version', 'link']:
+            changelog = kacl.load(changelog_file)
+            changelog.add('Added', 'added in memory')
+            lines = kacl.dump(changelog).split('\n')
+            if edit == 'version':
+                line = lines.index('## [1.0.0] - 2017-06-20')+1
+                changelog.apply_edit(line+1, line, "### Fixed\n- edited\n")
+            else:
+                line = next(i for i, x in enumerate(lines) if x.startswith('[1.0.0]:'))+1
+                changelog.apply_edit(line, line, "[1.0.0]: https://example.com/1.0.0\n")
+
+            self.assertIn('added in memory', changelog.get('Unreleased').changes('Added').items())
+            reference = kacl.parse(kacl.dump(changelog))
+            self.assertEqual([(x.version(), x.line_number()) for x in changelog.versions()],
+                             [(x.version(), x.line_number()) for x in reference.versions()])
+            if edit == 'version':
+                self.assertEqual(changelog.get('1.0.0').changes('Fixed').items(), ['edited'])
+            else:
+                self.assertEqual(changelog.get('1.0.0').link(), 'https://example.com/1.0.0')
+
+    def test_incremental_validation(self):
+        from kacl.lsp import KACLIncrementalValidator
+
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG_invalid.md")
+        with open(changelog_file, 'r') as f:
+            lines = f.read().split('\n')
+        changelog = kacl.parse('\n'.join(lines))
+        validator = KACLIncrementalValidator()
+        validator.validate(changelog)
+
+        # insert an invalid version in front of the first one, all following errors move down
+        first_line = changelog.versions()[0].line_number()
+        changelog.apply_edit(first_line, first_line-1, "## [foo] - 2020-01-01\n\n")
+        lines[first_line-1:first_line-1] = ["## [foo] - 2020-01-01", ""]
+
+        errors = [(x.line_number(), x.error_message(), x.position()) for x in validator.validate(changelog).errors()]
+        reference = kacl.parse('\n'.join(lines)).validate()
+        self.assertEqual(errors, [(x.line_number(), x.error_message(), x.position()) for x in reference.errors()])
+        self.assertIn((first_line, "Version is not a valid semantic version.", (3, 10)), errors)
+        self.assertIsNone(validator.validate(changelog, cancelled=lambda: True))
+
+    def test_language_server(self):
+        from kacl.lsp import KACLLanguageServer
+        import io
+
+        def frame(message):
+            body = json.dumps(message).encode('utf-8')
+            return f'Content-Length: {len(body)}\r\n\r\n'.encode('ascii') + body
+
+        uri = 'file:///tmp/CHANGELOG.md'
+        text = "# Changelog\n\nAll notable changes to this project will be documented in this file.\n\n" \
+               "The format is based on [Keep a Changelog](https://keepachangelog.com/en/1.0.0/),\n" \
+               "and this project adheres to [Semantic Versioning](https://semver.org/spec/v2.0.0.html).\n\n" \
+               "## Unreleased\n\n## 1.0.0 - 2020-01-01\n### Added\n- feature\n"
+        messages = [
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'initialize', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+             'params': {'textDocument': {'uri': uri, 'version': 1, 'text': text}}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didChange',
+             'params': {'textDocument': {'uri': uri, 'version': 2},
+                        'contentChanges': [{'range': {'start': {'line': 9, 'character': 3},
+                                                      'end': {'line': 9, 'character': 8}},
+                                            'text': 'one'}]}},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'shutdown'},
+            {'jsonrpc': '2.0', 'method': 'exit'},
+        ]
+        output = io.BytesIO()
+        server = KACLLanguageServer(io.BytesIO(b''.join(frame(x) for x in messages)), output, delay=0)
+        self.assertEqual(server.serve(), 0)
+
+        reader = KACLLanguageServer(io.BytesIO(output.getvalue()), io.BytesIO())
+        responses = list(iter(reader.read_message, None))
+        self.assertEqual(responses[0]['result']['capabilities']['textDocumentSync']['change'], 2)
+        self.assertEqual(responses[1]['params'], {'uri': uri, 'diagnostics': [], 'version': 1})
+
+        diagnostics = responses[2]['params']['diagnostics']
+        self.assertEqual(responses[2]['params']['version'], 2)
+        self.assertEqual(len(diagnostics), 1)
+        self.assertEqual(diagnostics[0]['range']['start'], {'line': 9, 'character': 3})
+        self.assertEqual(diagnostics[0]['message'], 'Version is not a valid semantic version.')
+        self.assertEqual(diagnostics[0]['code'], '3')
+        self.assertEqual(responses[3], {'jsonrpc': '2.0', 'id': 2, 'result': None})
+
+    def test_language_server_append(self):
+        from kacl.lsp import KACLLanguageServer
+        import io
+
+        def frame(message):
+            body = json.dumps(message).encode('utf-8')
+            return f'Content-Length: {len(body)}\r\n\r\n'.encode('ascii') + body
+
+        text = "# Changelog\n\nAll notable changes to this project will be documented in this file.\n\n" \
+               "The format is based on [Keep a Changelog](https://keepachangelog.com/en/1.0.0/),\n" \
+               "and this project adheres to [Semantic Versioning](https://semver.org/spec/v2.0.0.html).\n\n" \
+               "## Unreleased\n\n## 1.0 - 2020-01-01"
+        appended = "\n### Added\n- feature"
+        lines = len(text.split('\n'))
+        messages = [
+            {'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+             'params': {'textDocument': {'uri': 'file:///tmp/a/CHANGELOG.md', 'version': 1, 'text': text}}},
+            # insertions right after the last line append to the document
+            {'jsonrpc': '2.0', 'method': 'textDocument/didChange',
+             'params': {'textDocument': {'uri': 'file:///tmp/a/CHANGELOG.md', 'version': 2},
+                        'contentChanges': [{'range': {'start': {'line': lines, 'character': 0},
+                                                      'end': {'line': lines, 'character': 0}},
+                                            'text': appended}]}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+             'params': {'textDocument': {'uri': 'file:///tmp/b/CHANGELOG.md', 'version': 1, 'text': text + appended}}},
+            {'jsonrpc': '2.0', 'method': 'exit'},
+        ]
+        output = io.BytesIO()
+        KACLLanguageServer(io.BytesIO(b''.join(frame(x) for x in messages)), output, delay=0).serve()
+
+        responses = list(iter(KACLLanguageServer(io.BytesIO(output.getvalue()), io.BytesIO()).read_message, None))
+        diagnostics = responses[1]['params']['diagnostics']
+        self.assertEqual(responses[1]['params']['version'], 2)
+        self.assertEqual(len(diagnostics), 1)
+        self.assertEqual(diagnostics[0]['range']['start']['line'], lines-1)
+        self.assertEqual(diagnostics, responses[2]['params']['diagnostics'])
+
+    def test_aio(self):
+        import asyncio
+        import kacl.aio
+
+        data_directory = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+        files = [os.path.join(data_directory, x) for x in ["CHANGELOG.md", "CHANGELOG_invalid.md"]]
+
+        async def run():
+            validations = await kacl.aio.verify_many(files)
+            document = await kacl.aio.load(files[0])
+            validation = await kacl.aio.validate(document)
+            with tempfile.TemporaryDirectory() as directory:
+                output_file = os.path.join(directory, 'CHANGELOG.md')
+                written = await kacl.aio.dump(document, output_file)
+                with open(output_file, 'r') as f:
+                    data = f.read()
+            return validations, validation, written, data, await kacl.aio.dump(document)
+
+        validations, validation, written, data, markdown = asyncio.run(run())
+        self.assertEqual([x.is_valid() for x in validations.values()], [True, False])
+        self.assertEqual(len(validations[files[1]].errors()), len(kacl.verify(files[1]).errors()))
+        self.assertTrue(validation.is_valid())
+        self.assertTrue(written)
+        self.assertEqual(data, markdown)
+
+    def test_aio_limit(self):
+        import asyncio
+        import concurrent.futures
+        import threading
+        from kacl.aio import KACLAsyncPool
+
+        lock = threading.Lock()
+        running = [0]
+        calls = []
+
+        def call(name, event=None):
+            with lock:
+                running[0] += 1
+                calls.append((name, running[0]))
+            if event is not None:
+                event.wait()
+            else:
+                time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return name
+
+        async def run():
+            # more workers than permits, the semaphore has to do the limiting
+            results = await asyncio.gather(*[KACLAsyncPool.run(call, x) for x in range(6)])
+
+            KACLAsyncPool.configure(executor=executor, limit=1)
+            event = threading.Event()
+            blocking = asyncio.ensure_future(KACLAsyncPool.run(call, 'blocking', event))
+            while not calls or calls[-1][0] != 'blocking':
+                await asyncio.sleep(0.01)
+            waiting = asyncio.ensure_future(KACLAsyncPool.run(call, 'cancelled'))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            event.set()
+            await blocking
+            # neither lost nor leaked a permit, the next calls run one after the other
+            await asyncio.wait_for(asyncio.gather(*[KACLAsyncPool.run(call, x) for x in range(3)]), 5)
+            return results, waiting.cancelled()
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+        KACLAsyncPool.configure(executor=executor, limit=2)
+        try:
+            results, cancelled = asyncio.run(run())
+        finally:
+            KACLAsyncPool.configure()
+            executor.shutdown()
+
+        self.assertEqual(results, list(range(6)))
+        self.assertTrue(cancelled)
+        self.assertEqual(max(x[1] for x in calls[:6]), 2)
+        self.assertEqual(calls[6:], [('blocking', 1), (0, 1), (1, 1), (2, 1)])
+
+    def test_parse_link_references(self):
+        text = "# Changelog\n## [1.0.0] - 2020-01-01\n- change\n\n[1.0.0]: https://a.b/1.0.0\n[ 0.9.0 ]:  https://a.b/0.9.0 \n"
+        begin, link_references = KACLParser.parse_link_references(text)
+
+        self.assertEqual(begin.line_number(), 5)
+        self.assertEqual(text[begin.start():begin.end()], "[1.0.0]: https://a.b/1.0.0")
+        self.assertEqual(list(link_references.keys()), ['1.0.0', '0.9.0'])
+        self.assertEqual(link_references['0.9.0'].body(), 'https://a.b/0.9.0')
+        self.assertEqual(link_references['0.9.0'].line_number(), 6)
+
+        changelog = kacl.parse(text)
+        errors = [x for x in changelog.validate().errors() if x.rule_id() == '4.1']
+        self.assertEqual([x.line_number() for x in errors], [6])
+
+    def test_generate_links_incremental(self):
+        changelog_file = os.path.join(os.path.dirname(
+            os.path.realpath(__file__)), "data/CHANGELOG.md")
+        changelog = kacl.load(changelog_file)
+        host_url = 'https://github.com/org/repo'
+
+        self.assertEqual(changelog.generate_links(host_url=host_url), len(changelog.versions()))
+        self.assertEqual(changelog.get('0.0.1').link(), 'https://github.com/org/repo/tree/0.0.1')
+        self.assertEqual(changelog.get('0.0.2').link(), 'https://github.com/org/repo/compare/0.0.1...0.0.2')
+        self.assertEqual(changelog.generate_links(host_url=host_url, incremental=True), 0)
+
+        # custom links are kept, outdated generated links are updated
+        changelog.get('0.2.0').set_link('https://example.com/custom')
+        changelog.get('0.0.8').set_link('https://github.com/org/repo/compare/0.0.1...0.0.8')
+        self.assertEqual(changelog.generate_links(host_url=host_url, incremental=True), 1)
+        self.assertEqual(changelog.get('0.2.0').link(), 'https://example.com/custom')
+        self.assertEqual(changelog.get('0.0.8').link(), 'https://github.com/org/repo/compare/0.0.7...0.0.8')
+
+    def test_link_provider_compile(self):
+        from kacl.link_provider import LinkProvider
+
+        render, regex = LinkProvider.compile('{host}/compare/{previous_version}...{version}', 'https://a.b')
+        self.assertEqual(render('1.0.0', '0.9.0', None), 'https://a.b/compare/0.9.0...1.0.0')
+        self.assertIsNotNone(regex.fullmatch('https://a.b/compare/0.1.0...0.2.0'))
+        self.assertIsNone(regex.fullmatch('https://c.d/compare/0.1.0...0.2.0'))
+
+        for template in ['{{literal}}/{host}/{version:>7}', '{host}/{version!r}', '{host}/{version.upper}',
+                         '{host}/compare/{previous_version!s}...{version}', '{host:.12}/{version:>7}/{previous_version}']:
+            render, _ = LinkProvider.compile(template, 'https://a.b')
+            expected = template.format(host='https://a.b', version='1.0.0', previous_version='0.9.0', latest_version=None)
+            self.assertEqual(render('1.0.0', '0.9.0', None), expected)
+
+        provider = LinkProvider('https://a.b', '{host}/compare/{previous_version!s}...{version}')
+        self.assertEqual(provider.compare_versions('1.0.0', '0.9.0'), 'https://a.b/compare/0.9.0...1.0.0')
+        self.assertFalse(provider.is_generated(provider.compare_versions_template, 'https://a.b/compare/0.9.0...1.0.0'))
+
+        # the host is rendered right away, format specs and conversions on it keep the regex
+        for template in ['{host:.11}/compare/{version}', '{host!r}/compare/{version}']:
+            render, regex = LinkProvider.compile(template, 'https://a.b/c')
+            self.assertEqual(render('1.0.0', None, None), template.format(host='https://a.b/c', version='1.0.0'))
+            self.assertIsNotNone(regex)
+            self.assertIsNotNone(regex.fullmatch(render('2.0.0', None, None)))
+            self.assertIsNone(regex.fullmatch('https://a.b/c/compare/2.0.0'))